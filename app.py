@@ -1,22 +1,47 @@
 from flask import Flask
 from flask_restful import Api
 from config import Config
-from models import db
+from models import db, configure_engine
+from fleet_index import fleet_index
+from cache import combinations_cache
+from metrics import metrics
+from scheduler import ReturnScheduler
+from fleet_io import export_fleet_command, import_fleet_command
 from resources.get_all_fleet import GetAllFleet
-from resources.best_combination import BestCombination
+from resources.bulk_fleet import BulkFleetImport, FleetExport
+from resources.best_combination import BestCombination, BestCombinationBatch, BestCombinationSets, CombinationCacheStats
 from resources.select_vehicle import SelectVehicle
+from resources.reserve_vehicle import ReserveBestVehicle
 
-def create_app():
+def create_app(overrides=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config.update(overrides or {})  # e.g. a different database for benchmarks
     
     db.init_app(app)  # Initialize SQLAlchemy with this app
+    configure_engine(app)  # SQLite pragmas
+    fleet_index.init_app(app)  # Availability index used by /combinations
+    combinations_cache.init_app(app)  # Response cache in front of /combinations
     api = Api(app)
+    metrics.init_app(app, api)  # Latency, SQL and serialization timings on /metrics
 
     # Register Resources
     api.add_resource(GetAllFleet, '/all/fleet')
+    api.add_resource(BulkFleetImport, '/all/fleet/bulk')
+    api.add_resource(FleetExport, '/all/fleet/export')
     api.add_resource(BestCombination, '/combinations')
+    api.add_resource(BestCombinationBatch, '/combinations/batch')
+    api.add_resource(BestCombinationSets, '/combinations/sets')
+    api.add_resource(CombinationCacheStats, '/combinations/cache')
     api.add_resource(SelectVehicle, '/select/<string:license_plate_number>')
+    api.add_resource(ReserveBestVehicle, '/reserve')
+
+    # CLI: python manage.py import-fleet vehicles.csv / export-fleet vehicles.ndjson
+    app.cli.add_command(import_fleet_command)
+    app.cli.add_command(export_fleet_command)
+
+    if app.config['RETURN_SCHEDULER_ENABLED']:
+        ReturnScheduler(app).start_with_first_request()  # Puts vehicles back into service when trips end
 
     return app
 
@@ -0,0 +1,277 @@
+"""
+ASGI entry point for the Vehicle Fleet API.
+
+Serves /all/fleet, /combinations and /select/<license_plate_number> with the
+same JSON contracts as the Flask app, using async SQLAlchemy sessions so one
+process can hold many requests waiting on the database at the same time.
+Configuration, the response cache and the return scheduler are shared with
+`create_app()`.
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:create_asgi_app --factory
+"""
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytz
+from flask_restful import marshal
+from sqlalchemy import case, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app import create_app
+from cache import combinations_cache
+from fleet_index import IndexedVehicle
+from models import Vehicle, apply_sqlite_pragmas
+from pricing import FleetColumns, iter_combinations
+from resources.best_combination import NDJSON, combinations_body, ndjson_lines, parse_window
+from resources.get_all_fleet import (fleet_page, fleet_page_statement, fleet_projection, fleet_vehicles,
+                                     parse_fleet_page, vehicle_args)
+from resources.select_vehicle import claim_statement
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_uri(uri, instance_path):
+    """
+    Async driver URL for a Flask-SQLAlchemy database URI.
+    Relative SQLite paths are resolved against the instance folder, like Flask-SQLAlchemy does.
+    """
+    scheme, _, rest = uri.partition('://')
+    if scheme == 'sqlite' and rest.startswith('/') and rest not in ('/', '/:memory:'):
+        path = rest[1:]
+        if not os.path.isabs(path):
+            rest = '/' + os.path.join(instance_path, path)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def query_int(request, name, default=None):
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def wants_ndjson(request):
+    if request.query_params.get('format') == 'ndjson':
+        return True
+    return request.headers.get('accept', '').split(',')[0].split(';')[0].strip() == NDJSON
+
+
+async def parse_vehicle_args(request):
+    """
+    Same fields and conversions as `vehicle_args.parse_args()`: JSON body first, then query string.
+    Returns (args, error_response).
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+
+    args = {}
+    for argument in vehicle_args.args:
+        value = body.get(argument.name, request.query_params.get(argument.name))
+        if value is None:
+            args[argument.name] = None
+            continue
+        try:
+            args[argument.name] = argument.type(value)
+        except (TypeError, ValueError):
+            return None, JSONResponse({"message": {argument.name: argument.help}}, 400)
+    return args, None
+
+
+def now_eet():
+    return datetime.now(tz=pytz.timezone("Europe/Bucharest"))
+
+
+def create_asgi_app(overrides=None):
+    flask_app = create_app(overrides)
+    config = flask_app.config
+    engine = create_async_engine(
+        async_database_uri(config['SQLALCHEMY_DATABASE_URI'], flask_app.instance_path),
+        **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    )
+    apply_sqlite_pragmas(engine.sync_engine, config.get('SQLITE_PRAGMAS'))
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    def fleet_changed(available_time=None):
+        combinations_cache.bump_version()
+        scheduler = flask_app.extensions.get('return_scheduler')
+        if scheduler is not None and available_time is not None:
+            scheduler.schedule(available_time)
+
+    async def find_vehicle(session, args):
+        if args['id']:
+            return await session.get(Vehicle, args['id'])
+        if args['license_plate_number']:
+            return (await session.execute(
+                select(Vehicle).filter_by(license_plate_number=args['license_plate_number'])
+            )).scalars().first()
+        return None
+
+    async def fleet(request):
+        if request.method == 'GET':
+            after_id, limit, error = parse_fleet_page(request.query_params, config)
+            if error:
+                return JSONResponse({"message": error}, 400)
+            projection, error = fleet_projection(request.query_params.get('fields'))
+            if error:
+                return JSONResponse({"message": error}, 400)
+
+            async with Session() as session:
+                statement = fleet_page_statement(projection, after_id, limit)
+                rows = (await session.execute(statement)).all()
+            body, headers = fleet_page(rows, projection, limit)
+            return JSONResponse(body, 200, headers)
+
+        args, error_response = await parse_vehicle_args(request)
+        if error_response is not None:
+            return error_response
+
+        async with Session() as session:
+            if request.method == 'POST':
+                vehicle = Vehicle(
+                    fuel_type=args['fuel_type'],
+                    range=args['range'],
+                    distance=args['distance'],
+                    seats=args['seats'],
+                    license_plate_number=args['license_plate_number'],
+                    car_brand=args['car_brand'],
+                    driver_name=args['driver_name'],
+                    on_route=args['on_route'],
+                    available_from=now_eet()
+                )
+                session.add(vehicle)
+                await session.commit()
+                await session.refresh(vehicle)  # read back what the database stored
+                fleet_changed()
+                return JSONResponse(marshal(vehicle, fleet_vehicles), 201)
+
+            vehicle = await find_vehicle(session, args)
+            if not vehicle:
+                # marshal_with shapes error bodies too; keep the same output
+                return JSONResponse(marshal({"message": "Vehicle not found."}, fleet_vehicles), 404)
+
+            if request.method == 'PUT':
+                for field in ['fuel_type', 'range', 'distance', 'seats', 'car_brand', 'driver_name', 'on_route']:
+                    if args[field] is not None:
+                        setattr(vehicle, field, args[field])
+                vehicle.available_from = now_eet()
+                await session.commit()
+                await session.refresh(vehicle)
+                fleet_changed()
+                return JSONResponse(marshal(vehicle, fleet_vehicles), 200)
+
+            await session.delete(vehicle)
+            await session.commit()
+            fleet_changed()
+            message = f"Vehicle with ID {args.get('id') or args['license_plate_number']} has been deleted."
+            return JSONResponse(marshal({"message": message}, fleet_vehicles), 200)
+
+    async def combinations(request):
+        passengers = query_int(request, 'passengers')
+        distance = query_int(request, 'distance')
+        if not passengers or not distance:
+            return JSONResponse({"message": "Please provide both passengers and distance parameters"}, 400)
+
+        limit, offset, error = parse_window(request.query_params)
+        if error:
+            return JSONResponse({"message": error}, 400)
+
+        streaming = wants_ndjson(request)
+        cache_key = None
+        if not streaming and combinations_cache.enabled:
+            cache_key = combinations_cache.key((passengers, distance, limit, offset))
+            cached = combinations_cache.get(cache_key)
+            if cached is not None:
+                return JSONResponse(cached)
+
+        current_time = now_eet()
+        # No in-memory fleet index here; the availability index serves this query.
+        # The ordering matches FleetIndex.columns, so ties rank the same in both modes.
+        async with Session() as session:
+            rows = (await session.execute(
+                select(*(getattr(Vehicle, name) for name in IndexedVehicle._fields))
+                .where(Vehicle.available_at(current_time), Vehicle.seats >= passengers)
+                .order_by(Vehicle.seats, Vehicle.on_route,
+                          case((Vehicle.on_route == True, Vehicle.available_from)), Vehicle.id)
+            )).all()
+        columns = FleetColumns(IndexedVehicle(*row) for row in rows)
+
+        request_details = {
+            'passengers': passengers,
+            'distance': distance,
+            'query_time': current_time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        if streaming:
+            rows = iter_combinations(columns, passengers, distance, limit, offset)
+            return StreamingResponse(ndjson_lines(request_details, rows), media_type=NDJSON)
+
+        body = combinations_body(request_details, columns, passengers, distance, limit, offset)
+        if cache_key is not None:
+            combinations_cache.set(cache_key, body)
+        return JSONResponse(body)
+
+    async def select_vehicle(request):
+        license_plate_number = request.path_params['license_plate_number']
+        distance = query_int(request, 'distance')
+        if request.method == 'PUT' and not distance:
+            return JSONResponse({"message": "Please provide distance parameter"}, 400)
+
+        async with Session() as session:
+            vehicle = (await session.execute(
+                select(Vehicle).filter_by(license_plate_number=license_plate_number)
+            )).scalars().first()
+            if not vehicle:
+                return JSONResponse({"message": "Vehicle not found"}, 404)
+
+            if request.method == 'PATCH':
+                current_time = now_eet()
+                vehicle.on_route = False
+                vehicle.available_from = current_time
+                await session.commit()
+                fleet_changed()
+                return JSONResponse({
+                    "message": f"Vehicle {license_plate_number} is now available",
+                    "available_from": current_time.strftime("%Y-%m-%d %H:%M:%S")
+                }, 200)
+
+            statement, trip_details, available_time = claim_statement(vehicle.id, vehicle.fuel_type, distance)
+            result = await session.execute(statement)
+            if result.rowcount != 1:
+                await session.rollback()
+                await session.refresh(vehicle)
+                return JSONResponse({
+                    "message": "Vehicle is already on route",
+                    "available_from": vehicle.available_from.strftime("%Y-%m-%d %H:%M:%S")
+                }, 400)
+            await session.commit()
+
+        fleet_changed(available_time)
+        return JSONResponse({
+            "message": f"Vehicle {license_plate_number} has been set on route",
+            "trip_details": trip_details
+        }, 200)
+
+    @asynccontextmanager
+    async def lifespan(_):
+        yield
+        await engine.dispose()
+
+    return Starlette(
+        routes=[
+            Route('/all/fleet', fleet, methods=['GET', 'POST', 'PUT', 'DELETE']),
+            Route('/combinations', combinations, methods=['GET']),
+            Route('/select/{license_plate_number}', select_vehicle, methods=['PUT', 'PATCH']),
+        ],
+        lifespan=lifespan,
+    )
@@ -0,0 +1,4 @@
+"""
+Load and performance scripts for the Vehicle Fleet API.
+Run them from the repository root, e.g. `python -m benchmarks.reservation_load`.
+"""
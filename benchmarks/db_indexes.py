@@ -0,0 +1,101 @@
+"""
+Before/after numbers for the vehicle indexes and SQLite pragmas.
+
+Builds a synthetic SQLite fleet twice: first with the old schema (no
+secondary indexes, default journal) and then migrated (indexes, WAL,
+synchronous=NORMAL). Both runs time the hot availability queries and a
+series of small committed writes.
+
+    python -m benchmarks.db_indexes --vehicles 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, insert, select, text, update
+from app import create_app
+from benchmarks.fleet_generator import generate_fleet
+from models import db, Vehicle
+
+
+def best_of(repeat, action):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - started)
+    return round(min(timings) * 1000, 3)
+
+
+def measure(app, now, repeat, writes):
+    with app.app_context():
+        session = db.session
+        results = {
+            # Original /combinations query shape
+            "combinations_query_ms": best_of(repeat, lambda: session.execute(
+                select(Vehicle.id).where(Vehicle.available_at(now), Vehicle.seats >= 7)
+            ).all()),
+            "free_by_seats_ms": best_of(repeat, lambda: session.execute(
+                select(Vehicle.id).where(Vehicle.on_route == False, Vehicle.seats >= 7)
+            ).all()),
+            # Return scheduler sweep (read part)
+            "finished_trips_ms": best_of(repeat, lambda: session.execute(
+                select(func.count()).where(Vehicle.on_route == True, Vehicle.available_from <= now)
+            ).scalar()),
+        }
+
+        ids = session.execute(select(Vehicle.id).limit(writes)).scalars().all()
+
+        def small_writes():
+            for vehicle_id in ids:
+                session.execute(update(Vehicle).where(Vehicle.id == vehicle_id).values(distance=Vehicle.distance + 1))
+                session.commit()
+
+        results["single_row_commits_per_second"] = round(writes / (best_of(1, small_writes) / 1000), 1)
+        results["journal_mode"] = session.execute(text("PRAGMA journal_mode")).scalar()
+    return results
+
+
+def run(count, repeat, writes):
+    rows, now = generate_fleet(count)
+    workdir = tempfile.mkdtemp(prefix="fleet-index-bench-")
+    report = {"vehicles": count}
+
+    for label, migrated in (("before", False), ("after", True)):
+        path = os.path.join(workdir, f"{label}.db")
+        overrides = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "RETURN_SCHEDULER_ENABLED": False,
+        }
+        if not migrated:
+            overrides["SQLITE_PRAGMAS"] = {}
+        app = create_app(overrides)
+        with app.app_context():
+            db.create_all()
+            if not migrated:
+                for index in Vehicle.__table__.indexes:
+                    index.drop(db.engine)
+            db.session.execute(insert(Vehicle), rows)
+            db.session.commit()
+            db.session.execute(text("ANALYZE"))
+        report[label] = measure(app, now, repeat, writes)
+        with app.app_context():
+            db.engine.dispose()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--writes", type=int, default=300)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.vehicles, args.repeat, args.writes), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Deterministic synthetic fleets for benchmarks and load tests.
+
+The same arguments and seed always produce the same vehicles; only
+`available_from` is relative to `now`, which defaults to the current time
+in EET. Rows are plain dicts ready for `insert(Vehicle)`.
+
+    rows, now = generate_fleet(10000, fuel_mix={"hybrid": 1, "gasoline": 1}, on_route_share=0.5)
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytz
+
+FUEL_MIX = {"gasoline": 0.6, "hybrid": 0.4}
+SEAT_WEIGHTS = {2: 1, 4: 2, 5: 2, 7: 1, 9: 1}
+RANGES = (300, 500, 800)
+CAR_BRANDS = ("Toyota", "Opel", "Renault", "Honda")
+# On-route vehicles are free again somewhere in this window around `now`
+TRIP_MINUTES = (-120, 120)
+
+
+def generate_fleet(count, seed=7, fuel_mix=None, seat_weights=None, on_route_share=0.3,
+                   now=None, plate_prefix="BENCH"):
+    """
+    Build `count` vehicle rows.
+    'fuel_mix' and 'seat_weights' map a fuel type or seat count to a relative weight,
+    'on_route_share' is the fraction of vehicles currently on a trip.
+    Returns (rows, now) with `now` as a naive EET datetime.
+    """
+    fuel_mix = fuel_mix or FUEL_MIX
+    seat_weights = seat_weights or SEAT_WEIGHTS
+    if now is None:
+        now = datetime.now(tz=pytz.timezone("Europe/Bucharest")).replace(tzinfo=None)
+
+    rng = random.Random(seed)
+    fuel_types = rng.choices(list(fuel_mix), weights=list(fuel_mix.values()), k=count)
+    seats = rng.choices(list(seat_weights), weights=list(seat_weights.values()), k=count)
+
+    rows = []
+    for number in range(count):
+        on_route = rng.random() < on_route_share
+        rows.append({
+            "fuel_type": fuel_types[number],
+            "range": rng.choice(RANGES),
+            "distance": 0,
+            "seats": seats[number],
+            "license_plate_number": f"{plate_prefix}-{number:07d}",
+            "car_brand": rng.choice(CAR_BRANDS),
+            "driver_name": f"Driver {number}",
+            "on_route": on_route,
+            "available_from": now + timedelta(minutes=rng.randint(*TRIP_MINUTES) if on_route else 0),
+        })
+    return rows, now
@@ -0,0 +1,117 @@
+"""
+Multi-threaded reservation load test.
+
+Many dispatcher threads call `PUT /reserve` against the same fleet until no
+vehicle is left, then all threads race for a single plate with
+`PUT /select/<plate>`. The script fails if any vehicle is booked twice and
+reports the reservation throughput as JSON.
+
+    python -m benchmarks.reservation_load --vehicles 500 --threads 16
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import insert
+from app import create_app
+from benchmarks.fleet_generator import generate_fleet
+from fleet_index import fleet_index
+from models import db, Vehicle
+
+
+def seed(app, count):
+    rows, _ = generate_fleet(count, on_route_share=0, plate_prefix="LOAD")
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(Vehicle), rows)
+        db.session.commit()
+
+
+def run_threads(threads, target):
+    barrier = threading.Barrier(threads)
+    results = [[] for _ in range(threads)]
+
+    def worker(slot):
+        barrier.wait()
+        target(results[slot])
+
+    pool = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return [item for result in results for item in result], time.perf_counter() - started
+
+
+def reserve_until_empty(app, threads, distance):
+    def target(reserved):
+        client = app.test_client()
+        while True:
+            response = client.put(f"/reserve?passengers=1&distance={distance}")
+            if response.status_code == 200:
+                reserved.append(response.get_json()["vehicle"]["license_plate"])
+            elif response.status_code == 404:
+                return
+
+    return run_threads(threads, target)
+
+
+def race_for_one_plate(app, threads, plate, distance):
+    def target(winners):
+        response = app.test_client().put(f"/select/{plate}?distance={distance}")
+        if response.status_code == 200:
+            winners.append(plate)
+
+    return run_threads(threads, target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--distance", type=int, default=30)
+    parser.add_argument("--database", help="SQLite file to use (default: a temporary file)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="fleet-load-")
+    database = args.database or os.path.join(workdir, "load.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(database)}"})
+    seed(app, args.vehicles)
+
+    reserved, elapsed = reserve_until_empty(app, args.threads, args.distance)
+    double_booked = sorted(plate for plate, count in Counter(reserved).items() if count > 1)
+
+    with app.app_context():
+        on_route = Vehicle.query.filter_by(on_route=True).count()
+        db.session.execute(db.update(Vehicle).values(on_route=False))
+        db.session.commit()
+    fleet_index.invalidate()
+
+    winners, _ = race_for_one_plate(app, args.threads, "LOAD-0000000", args.distance)
+
+    report = {
+        "vehicles": args.vehicles,
+        "threads": args.threads,
+        "reservations": len(reserved),
+        "distinct_vehicles": len(set(reserved)),
+        "vehicles_on_route": on_route,
+        "double_booked": double_booked,
+        "seconds": round(elapsed, 4),
+        "reservations_per_second": round(len(reserved) / elapsed, 1) if elapsed else None,
+        "single_plate_race_winners": len(winners),
+    }
+    print(json.dumps(report, indent=2))
+
+    ok = (not double_booked and len(reserved) == args.vehicles == on_route and len(winners) == 1)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Reproducible benchmark suite for the Vehicle Fleet API.
+
+For every fleet size a fresh SQLite database is filled through
+POST /all/fleet/bulk with a synthetic fleet (see fleet_generator.py), then
+`create_app()` is driven through the Flask test client to time
+GET /combinations, GET /combinations/sets, GET /all/fleet paging and
+PUT/PATCH /select reserve/release cycles. The response cache and the return scheduler are
+off, so every request reaches the data layer. Results are printed (or
+written) as JSON, together with the commit and Python version, so runs of
+different releases can be compared.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, update
+from app import create_app
+from benchmarks.fleet_generator import generate_fleet
+from fleet_index import fleet_index
+from fleet_io import IMPORT_COLUMNS
+from models import db, Vehicle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OVERRIDES = {'COMBINATIONS_CACHE_TTL': 0, 'RETURN_SCHEDULER_ENABLED': False, 'DEBUG': False}
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    count = len(timings)
+    return {
+        'requests': count,
+        'mean_ms': round(sum(timings) / count * 1000, 3),
+        'p50_ms': round(timings[count // 2] * 1000, 3),
+        'p95_ms': round(timings[min(count - 1, int(count * 0.95))] * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3),
+    }
+
+
+def timed(client, method, path, expected=200, **kwargs):
+    started = time.perf_counter()
+    response = client.open(path, method=method, **kwargs)
+    response.get_data()
+    elapsed = time.perf_counter() - started
+    if response.status_code != expected:
+        raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return elapsed, response
+
+
+def bulk_import(app, client, rows):
+    """
+    Time the bulk import of the fleet, then put the generated trips in place.
+    Imports always start vehicles as available, so on-route times are set afterwards (untimed).
+    """
+    body = ''.join(json.dumps({name: row[name] for name in IMPORT_COLUMNS}) + '\n' for row in rows)
+    elapsed, response = timed(client, 'POST', '/all/fleet/bulk', expected=201,
+                              data=body, content_type='application/x-ndjson')
+    if response.get_json()['inserted'] != len(rows):
+        raise RuntimeError(f"Bulk import rejected rows: {response.get_json()['errors'][:3]}")
+
+    trips = [{'plate': row['license_plate_number'], 'until': row['available_from']}
+             for row in rows if row['on_route']]
+    with app.app_context():
+        if trips:
+            db.session.execute(
+                update(Vehicle.__table__)
+                .where(Vehicle.license_plate_number == bindparam('plate'))
+                .values(available_from=bindparam('until')),
+                trips
+            )
+            db.session.commit()
+        fleet_index.invalidate()
+
+    return {
+        'seconds': round(elapsed, 3),
+        'vehicles_per_second': round(len(rows) / elapsed, 1),
+    }
+
+
+def combinations(client, rng, repeat, limit=None):
+    timings = []
+    for _ in range(repeat):
+        path = f"/combinations?passengers={rng.randint(1, 9)}&distance={rng.randint(5, 150)}"
+        if limit:
+            path += f"&limit={limit}"
+        timings.append(timed(client, 'GET', path)[0])
+    return summarize(timings)
+
+
+def combination_sets(client, rng, repeat):
+    timings = [
+        timed(client, 'GET', f"/combinations/sets?passengers={rng.randint(8, 30)}&distance={rng.randint(5, 150)}")[0]
+        for _ in range(repeat)
+    ]
+    return summarize(timings)
+
+
+def fleet_listing(client, rng, repeat, count):
+    """
+    Random single pages, then one walk over the whole fleet with the largest page size.
+    """
+    timings = [
+        timed(client, 'GET', f"/all/fleet?after_id={rng.randint(0, count)}")[0]
+        for _ in range(repeat)
+    ]
+    report = summarize(timings)
+
+    walked, pages, after_id = 0.0, 0, 0
+    while True:
+        elapsed, response = timed(client, 'GET', f"/all/fleet?after_id={after_id}&limit=1000")
+        walked += elapsed
+        pages += 1
+        if 'X-Next-After-Id' not in response.headers:
+            break
+        after_id = response.headers['X-Next-After-Id']
+    report['full_walk'] = {'pages': pages, 'seconds': round(walked, 3)}
+    return report
+
+
+def select_cycles(client, rng, repeat, plates):
+    reserve, release = [], []
+    for plate in rng.sample(plates, min(repeat, len(plates))):
+        reserve.append(timed(client, 'PUT', f"/select/{plate}?distance={rng.randint(5, 150)}")[0])
+        release.append(timed(client, 'PATCH', f"/select/{plate}")[0])
+    return {'reserve': summarize(reserve), 'release': summarize(release)}
+
+
+def run_size(count, args):
+    rows, _ = generate_fleet(count, seed=args.seed, on_route_share=args.on_route_share)
+    database = os.path.join(tempfile.mkdtemp(prefix='fleet-bench-'), 'bench.db')
+    app = create_app(dict(OVERRIDES, SQLALCHEMY_DATABASE_URI=f'sqlite:///{database}'))
+    with app.app_context():
+        db.create_all()
+
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    report = {'vehicles': count, 'bulk_import': bulk_import(app, client, rows)}
+
+    started = time.perf_counter()
+    timed(client, 'GET', '/combinations?passengers=1&distance=10&limit=1')
+    report['index_warmup_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    report['combinations'] = combinations(client, rng, args.repeat)
+    report['combinations_top10'] = combinations(client, rng, args.repeat, limit=10)
+    report['combination_sets'] = combination_sets(client, rng, args.repeat)
+    report['fleet_listing'] = fleet_listing(client, rng, args.repeat, count)
+    free_plates = [row['license_plate_number'] for row in rows if not row['on_route']]
+    report['select_cycle'] = select_cycles(client, rng, args.repeat, free_plates)
+
+    with app.app_context():
+        db.engine.dispose()
+    return report
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per scenario')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--on-route-share', type=float, default=0.3)
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    report = dict(environment(), seed=args.seed, repeat=args.repeat,
+                  results=[run_size(count, args) for count in args.sizes])
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
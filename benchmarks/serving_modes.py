@@ -0,0 +1,159 @@
+"""
+Load comparison of the Flask (WSGI) and the async (ASGI) serving modes.
+
+Seeds a temporary SQLite fleet, starts each server in its own process on the
+same database and fires concurrent keep-alive clients at GET /combinations
+and GET /all/fleet. Throughput and latency percentiles are printed as JSON.
+The response cache is disabled so every request reaches the data layer.
+
+    python -m benchmarks.serving_modes --vehicles 5000 --concurrency 32 --duration 10
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert
+from app import create_app
+from benchmarks.fleet_generator import generate_fleet
+from models import db, Vehicle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OVERRIDES = {'COMBINATIONS_CACHE_TTL': 0, 'DEBUG': False}
+
+SERVERS = {
+    'wsgi': (
+        "from app import create_app\n"
+        "create_app({overrides}).run(port={port}, threaded=True)\n"
+    ),
+    'asgi': (
+        "import uvicorn\n"
+        "from asgi import create_asgi_app\n"
+        "uvicorn.run(create_asgi_app({overrides}), port={port}, log_level='warning')\n"
+    ),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def generate_load(port, concurrency, duration, seed):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(slot):
+        rng = random.Random(seed + slot)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        own = []
+        while time.monotonic() < deadline:
+            if rng.random() < 0.8:
+                path = f"/combinations?passengers={rng.randint(1, 7)}&distance={rng.randint(5, 120)}&limit=10"
+            else:
+                path = f"/all/fleet?after_id={rng.randint(0, 1000)}&limit=100"
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                ok = False
+            if ok:
+                own.append(time.perf_counter() - started)
+            else:
+                with lock:
+                    errors[0] += 1
+        connection.close()
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            name: round(percentile(latencies, fraction) * 1000, 2) if latencies else None
+            for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+        },
+    }
+
+
+def run(vehicles, concurrency, duration, modes):
+    database = os.path.join(tempfile.mkdtemp(prefix='fleet-serving-'), 'serving.db')
+    overrides = dict(OVERRIDES, SQLALCHEMY_DATABASE_URI=f'sqlite:///{database}')
+
+    app = create_app(dict(overrides, RETURN_SCHEDULER_ENABLED=False))
+    rows, _ = generate_fleet(vehicles)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Vehicle), rows)
+        db.session.commit()
+
+    report = {'vehicles': vehicles, 'concurrency': concurrency, 'duration_seconds': duration}
+    for mode in modes:
+        port = free_port()
+        code = SERVERS[mode].format(overrides=repr(overrides), port=port)
+        server = subprocess.Popen([sys.executable, '-c', code], cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(port)
+            generate_load(port, concurrency, 1, seed=0)  # warm-up
+            report[mode] = generate_load(port, concurrency, duration, seed=1)
+        finally:
+            server.terminate()
+            server.wait()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--modes', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.vehicles, args.concurrency, args.duration, args.modes), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Only needed for a shared cache between workers
+    redis = None
+
+# Backend failures that should cost a cache miss, not the request
+BACKEND_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+
+class LocalBackend:
+    """
+    Bounded in-process LRU store with per-entry TTL.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def version(self):
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._version += 1
+            # Entries of older versions can never be hit again
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Store shared by all workers. Redis expires the entries itself, and its
+    maxmemory policy takes care of evictions. Redis only counts those per
+    server, not per key prefix, so eviction, expiration and size figures are
+    reported as unknown (None).
+    """
+
+    evictions = None
+    expirations = None
+
+    def __init__(self, url, prefix='fleet:combinations:'):
+        if redis is None:
+            raise RuntimeError("COMBINATIONS_CACHE_URL requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def version(self):
+        return int(self.client.get(self.prefix + 'version') or 0)
+
+    def bump_version(self):
+        self.client.incr(self.prefix + 'version')
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    """
+    Cache for /combinations responses.
+
+    Keys combine the query parameters with a fleet version counter. Every
+    write to the fleet bumps the counter, so a cached ranking is never served
+    after the fleet changed. Entries also expire after
+    `COMBINATIONS_CACHE_TTL` seconds, which bounds staleness when other
+    workers write and only a local backend is configured. Setting
+    `COMBINATIONS_CACHE_URL` to a Redis URL shares entries and the version
+    counter between all workers. If Redis is unreachable, requests are
+    answered without the cache and the error is logged.
+    """
+
+    def __init__(self):
+        self.backend = LocalBackend(0)
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.logger = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config['COMBINATIONS_CACHE_TTL']
+        self.logger = app.logger
+        url = app.config.get('COMBINATIONS_CACHE_URL')
+        self.backend = RedisBackend(url) if url else LocalBackend(app.config['COMBINATIONS_CACHE_SIZE'])
+        self.hits = self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and (not isinstance(self.backend, LocalBackend) or self.backend.max_size > 0)
+
+    def key(self, params):
+        """
+        Cache key for the query `params` at the current fleet version.
+        Build it before reading the fleet, so a write that lands in between
+        makes the stored entry unreachable instead of serving stale data.
+        Returns None when the backend is unavailable; get() and set() treat
+        that as a miss.
+        """
+        try:
+            version = self.backend.version()
+        except BACKEND_ERRORS:
+            self._log_failure("read the fleet version from")
+            return None
+        return f"{version}:" + ":".join(str(param) for param in params)
+
+    def get(self, key):
+        value = None
+        if key is not None:
+            try:
+                value = self.backend.get(key)
+            except BACKEND_ERRORS:
+                self._log_failure("read from")
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if key is None:
+            return
+        try:
+            self.backend.set(key, value, self.ttl)
+        except BACKEND_ERRORS:
+            self._log_failure("write to")
+
+    def bump_version(self):
+        """
+        Call after every committed write to the fleet.
+        The write already succeeded, so a failing backend is logged, not raised.
+        """
+        try:
+            self.backend.bump_version()
+        except BACKEND_ERRORS:
+            self._log_failure("bump the fleet version in")
+
+    def stats(self):
+        try:
+            version = self.backend.version()
+        except BACKEND_ERRORS:
+            self._log_failure("read the fleet version from")
+            version = None
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'expirations': self.backend.expirations,
+            'size': self.backend.size(),
+            'fleet_version': version,
+        }
+
+    def _log_failure(self, action):
+        if self.logger is not None:
+            self.logger.exception("Could not %s the response cache", action)
+
+
+combinations_cache = ResponseCache()
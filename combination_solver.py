@@ -0,0 +1,175 @@
+"""
+Most profitable sets of vehicles that carry a group together.
+
+For one trip every vehicle's profit only depends on its fuel type, so the
+fleet collapses into a few classes of interchangeable vehicles, one per
+(seats, hybrid) pair. A bounded-knapsack DP over seat capacity gives the
+best profit that can still be added from each class on; a branch and
+bound over how many vehicles of each class to take then follows it to the
+top sets without entering branches that cannot make the cut.
+
+Every vehicle earns a positive profit, so adding cars always pays more; a
+set only counts when it is minimal, i.e. no vehicle in it could be left out
+and the rest would still seat everyone. Classes are visited from the
+largest seat count down and a set is closed by the vehicle that covers the
+group, which enumerates every minimal set exactly once.
+"""
+import heapq
+from itertools import count
+from typing import NamedTuple
+
+import numpy as np
+from pricing import _number, price_fleet, vehicle_row
+
+
+class VehicleClass(NamedTuple):
+    seats: int
+    hybrid: bool
+    profit: float
+    members: list  # snapshot positions, in availability order
+
+
+def vehicle_classes(columns, distance):
+    """
+    Group a FleetColumns snapshot into classes, largest seat count first.
+    Returns (classes, minutes, priced) with `priced` holding one column entry per class.
+    """
+    keys = columns.seats * 2 + columns.hybrid
+    unique, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(unique)))[:-1])
+
+    # np.unique sorts ascending; within the same seat count hybrids (the more profitable) come first
+    unique, groups = unique[::-1], groups[::-1]
+    minutes, priced = price_fleet((unique % 2).astype(bool), distance)
+    classes = [
+        VehicleClass(int(key) // 2, bool(key % 2), float(profit), group.tolist())
+        for key, profit, group in zip(unique.tolist(), priced['profit'], groups)
+    ]
+    return classes, minutes, priced
+
+
+def completion_bounds(classes, passengers, max_vehicles):
+    """
+    Exact best profit of finishing a set from each class on, as a DP over
+    (seats still needed, vehicles still allowed).
+    `bounds[i][need, left]` is -inf where classes i.. cannot close a minimal set.
+    """
+    needs = np.arange(passengers + 1)
+    bounds = [None] * len(classes) + [np.full((passengers + 1, max_vehicles + 1), -np.inf)]
+    for i in reversed(range(len(classes))):
+        vehicle_class, after = classes[i], bounds[i + 1]
+        most = min(len(vehicle_class.members), max_vehicles)
+        best = np.full_like(after, -np.inf)
+
+        # Take `taken` vehicles of this class and let the later classes close the set
+        for taken in range(most + 1):
+            skipped = taken * vehicle_class.seats
+            if skipped >= passengers:
+                break
+            best[skipped + 1:, taken:] = np.maximum(
+                best[skipped + 1:, taken:],
+                after[1:passengers + 1 - skipped, :max_vehicles + 1 - taken] + taken * vehicle_class.profit)
+
+        # Or close it here: just enough vehicles of this class to seat the rest
+        closing = -(-needs // vehicle_class.seats)
+        allowed = np.minimum(most, np.arange(max_vehicles + 1))
+        closes = (closing[:, None] <= allowed[None, :]) & (needs[:, None] > 0)
+        best = np.where(closes, np.maximum(best, (closing * vehicle_class.profit)[:, None]), best)
+        bounds[i] = best
+    return bounds
+
+
+def best_sets(classes, passengers, limit, max_vehicles):
+    """
+    The `limit` most profitable minimal sets of at most `max_vehicles` vehicles
+    with at least `passengers` seats in total, best first.
+    Returns (profit, vehicle_count, counts per class) tuples.
+
+    The search is guided by the exact bounds of `completion_bounds`: every
+    branch it enters can still beat the current `limit`-th set, and the
+    most profitable branch is tried first. Sets with equal profit keep the
+    order in which they were found.
+    """
+    if passengers <= 0 or limit <= 0 or not classes or passengers > max_vehicles * classes[0].seats:
+        return []
+    bounds = completion_bounds(classes, passengers, max_vehicles)
+
+    found = []  # min-heap of (profit, -sequence, counts)
+    sequence = count()
+    counts = [0] * len(classes)
+
+    def worth(value):
+        return value > -np.inf and (len(found) < limit or value > found[0][0])
+
+    def record(profit):
+        entry = (profit, -next(sequence), tuple(counts))
+        if len(found) < limit:
+            heapq.heappush(found, entry)
+        else:
+            heapq.heapreplace(found, entry)
+
+    def search(i, need, left, profit):
+        vehicle_class = classes[i]
+        closing = -(-need // vehicle_class.seats)  # vehicles of this class that seat the rest
+        most = min(len(vehicle_class.members), left)
+
+        options = []
+        for taken in range(min(closing - 1, most) + 1):
+            rest = bounds[i + 1][need - taken * vehicle_class.seats, left - taken]
+            options.append((taken * vehicle_class.profit + rest, taken))
+        if closing <= most:
+            options.append((closing * vehicle_class.profit, closing))
+        options.sort(key=lambda option: -option[0])
+
+        for value, taken in options:
+            if not worth(profit + value):
+                break
+            counts[i] = taken
+            if taken == closing:
+                record(profit + value)
+            else:
+                search(i + 1, need - taken * vehicle_class.seats, left - taken,
+                       profit + taken * vehicle_class.profit)
+        counts[i] = 0
+
+    if worth(bounds[0][passengers, max_vehicles]):
+        search(0, passengers, max_vehicles, 0.0)
+    return [(float(profit), sum(counts), counts)
+            for profit, _, counts in sorted(found, reverse=True)]
+
+
+def rank_sets(columns, passengers, distance, limit, max_vehicles):
+    """
+    Response rows of GET /combinations/sets: the best sets with their vehicles and totals.
+    Sets are alternatives, so the same vehicle can appear in several of them.
+    """
+    classes, minutes, priced = vehicle_classes(columns, distance)
+    actual_distance = priced['actual_distance'].tolist()
+    revenue = priced['revenue'].tolist()
+    costs = priced['costs'].tolist()
+    discounted = priced['discounted'].tolist()
+
+    rows = []
+    for profit, vehicle_count, counts in best_sets(classes, passengers, limit, max_vehicles):
+        vehicles, totals, as_float = [], {'revenue': 0, 'costs': 0}, False
+        for index, taken in enumerate(counts):
+            for position in classes[index].members[:taken]:
+                vehicles.append(vehicle_row(columns.vehicles[position], minutes, actual_distance[index],
+                                            revenue[index], costs[index], classes[index].profit,
+                                            discounted[index]))
+            totals['revenue'] += taken * revenue[index]
+            totals['costs'] += taken * costs[index]
+            if taken and discounted[index]:
+                as_float = True
+
+        rows.append({
+            'vehicle_count': vehicle_count,
+            'total_seats': sum(vehicle['seats'] for vehicle in vehicles),
+            'travel_time_minutes': minutes,
+            'revenue': _number(totals['revenue'], as_float),
+            'costs': _number(totals['costs'], as_float),
+            'profit': _number(profit, as_float),
+            'vehicles': vehicles
+        })
+    return rows
@@ -1,10 +1,65 @@
+import os
+
+
+def engine_options(database_uri):
+    """
+    Connection pool settings for server databases (e.g. PostgreSQL), read from the environment.
+    SQLite keeps SQLAlchemy's defaults.
+    """
+    if database_uri.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
+
+
 class Config:
     """
     Configuration for the Vehicle Fleet API.
-    Add environment variable usage if you like: 
-    e.g., SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///vehicle_fleet.db")
+    The database is taken from the DATABASE_URL environment variable, if set.
     """
-    SQLALCHEMY_DATABASE_URI = "sqlite:///vehicle_fleet.db"
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///vehicle_fleet.db")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Applied to every new SQLite connection: WAL lets readers run while a write commits
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 268435456,
+    }
     DEBUG = True
-
+    # Seconds between checks of the shared fleet version, so writes made by
+    # other workers become visible in the in-memory fleet index.
+    FLEET_INDEX_TTL = 5
+    # Upper bound on trips scored by one POST /combinations/batch call
+    COMBINATIONS_BATCH_MAX_TRIPS = 1000
+    # Vehicles per trip in a batch response by default / at most
+    COMBINATIONS_BATCH_LIMIT = 10
+    COMBINATIONS_BATCH_MAX_LIMIT = 100
+    # GET /combinations/sets: sets returned by default / at most, and vehicles per set
+    COMBINATION_SETS_LIMIT = 5
+    COMBINATION_SETS_MAX_LIMIT = 50
+    COMBINATION_SETS_MAX_VEHICLES = 10
+    # Default and maximum page size of GET /all/fleet
+    FLEET_PAGE_SIZE = 100
+    FLEET_PAGE_MAX_SIZE = 1000
+    # How many ranked candidates PUT /reserve tries before giving up with 409
+    RESERVE_MAX_ATTEMPTS = 5
+    # Background release of vehicles whose trip is over (see scheduler.py)
+    RETURN_SCHEDULER_ENABLED = True
+    RETURN_SCHEDULER_MAX_WAIT = 10
+    RETURN_SCHEDULER_BATCH_SIZE = 500
+    # Rows per INSERT transaction for bulk imports (also the export fetch size)
+    BULK_IMPORT_CHUNK_SIZE = 1000
+    # /combinations response cache; a Redis URL shares it between workers
+    COMBINATIONS_CACHE_SIZE = 1024
+    COMBINATIONS_CACHE_TTL = 1.0
+    COMBINATIONS_CACHE_URL = os.getenv("COMBINATIONS_CACHE_URL")
+    # Per-request cProfile summaries (X-Profile: 1 or ?profile=1); for staging only
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED") == "1"
+    PROFILING_TOP_FUNCTIONS = 30
@@ -1,4 +1,7 @@
-from app import db, app
+from app import create_app
+from models import db
+
+app = create_app({'RETURN_SCHEDULER_ENABLED': False})
 
 with app.app_context():
-    db.create_all()
\ No newline at end of file
+    db.create_all()
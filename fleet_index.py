@@ -0,0 +1,320 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+import pytz
+from flask import current_app
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from models import db, FleetVersion, Vehicle
+from pricing import HYBRID, FleetColumns, hybrid_flags
+
+EET = pytz.timezone("Europe/Bucharest")
+
+# Sort key used for idle vehicles so they always sit at the front of a bucket
+IDLE_KEY = datetime.min
+
+
+def fleet_version():
+    """
+    Current value of the shared fleet version counter.
+    """
+    return db.session.execute(select(FleetVersion.version).where(FleetVersion.id == 1)).scalar() or 0
+
+
+def index_rows():
+    """
+    SELECT of the vehicle columns kept in the index.
+    """
+    return select(*(getattr(Vehicle, name) for name in IndexedVehicle._fields))
+
+
+def as_local_naive(value):
+    """
+    Normalize a datetime to naive EET, which is how SQLite hands values back.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(EET).replace(tzinfo=None)
+    return value
+
+
+class IndexedVehicle(NamedTuple):
+    """
+    Read-only snapshot of the vehicle columns the ranking endpoints need.
+    """
+    id: int
+    fuel_type: str
+    seats: int
+    license_plate_number: str
+    car_brand: str
+    on_route: bool
+    available_from: datetime
+
+    @classmethod
+    def from_row(cls, row):
+        vehicle = cls._make(row)
+        if vehicle.available_from.tzinfo is not None:
+            vehicle = vehicle._replace(available_from=as_local_naive(vehicle.available_from))
+        return vehicle
+
+    @property
+    def sort_key(self):
+        """
+        Moment from which the vehicle can be booked; idle vehicles sort first.
+        """
+        return (IDLE_KEY if not self.on_route else self.available_from, self.id)
+
+
+class SeatBucket:
+    """
+    Vehicles with the same seat count, sorted by availability, with their
+    hybrid flags in an aligned NumPy array so lookups can slice both.
+    """
+    __slots__ = ('keys', 'vehicles', 'hybrid')
+
+    def __init__(self, vehicles=()):
+        self.vehicles = sorted(vehicles, key=lambda vehicle: vehicle.sort_key)
+        self.keys = [vehicle.sort_key for vehicle in self.vehicles]
+        self.hybrid = hybrid_flags(self.vehicles)
+
+    def add(self, vehicle):
+        position = bisect_left(self.keys, vehicle.sort_key)
+        self.keys.insert(position, vehicle.sort_key)
+        self.vehicles.insert(position, vehicle)
+        # A new array, so slices handed out earlier stay untouched
+        self.hybrid = np.insert(self.hybrid, position, vehicle.fuel_type == HYBRID)
+
+    def discard(self, vehicle):
+        position = bisect_left(self.keys, vehicle.sort_key)
+        del self.keys[position]
+        del self.vehicles[position]
+        self.hybrid = np.delete(self.hybrid, position)
+
+
+class FleetIndex:
+    """
+    Process-local index of the fleet, bucketed by seat count.
+
+    Every bucket is kept sorted by availability, so a lookup only touches the
+    vehicles that can actually be booked, and carries their pricing columns,
+    so `columns()` slices arrays instead of walking vehicles. The write paths
+    keep the index in sync by calling `refresh` with the vehicles they
+    changed once their transaction is committed. Writes
+    made by other workers are detected by comparing the `FleetVersion` counter
+    with the version the index was loaded at, at most once every
+    `FLEET_INDEX_TTL` seconds. A changed fleet is reloaded in a background
+    thread while lookups keep using the current index; `invalidate()` forces a
+    reload on the next lookup.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._vehicles = {}   # id -> IndexedVehicle
+        self._buckets = {}    # seats -> SeatBucket
+        self._seat_counts = []
+        self._loaded_at = None
+        self._checked_at = None
+        self._version = None
+        self._generation = 0  # bumped by invalidate() so a reload in flight is not trusted
+        self._replay = None   # local changes made while a reload is in flight
+
+    def init_app(self, app):
+        self.ttl = app.config.get("FLEET_INDEX_TTL", self.ttl)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Force a reload from the database on the next lookup.
+        """
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    def note_committed_version(self, version):
+        """
+        Called after this process committed a fleet write that moved the shared
+        version to `version`. If nobody else wrote in between, the index stays
+        current through the local update that follows the commit.
+        """
+        with self._lock:
+            if self._version is not None and version == self._version + 1:
+                self._version = version
+
+    def sync(self):
+        """
+        Reload the whole index from the database.
+        The new index is built without holding the lock and then swapped in;
+        local changes made in the meantime are applied again on top of it.
+        """
+        with self._lock:
+            generation = self._generation
+            self._replay = []
+        try:
+            version = fleet_version()
+            rows = db.session.execute(index_rows()).all()
+            vehicles, by_seats = {}, {}
+            for row in rows:
+                vehicle = IndexedVehicle.from_row(row)
+                vehicles[vehicle.id] = vehicle
+                by_seats.setdefault(vehicle.seats, []).append(vehicle)
+            buckets = {seats: SeatBucket(members) for seats, members in by_seats.items()}
+        except BaseException:
+            with self._lock:
+                self._replay = None
+            raise
+
+        with self._lock:
+            self._vehicles, self._buckets, self._seat_counts = vehicles, buckets, sorted(buckets)
+            for change in self._replay:
+                change()
+            self._replay = None
+            self._version = version
+            self._checked_at = time.monotonic()
+            if generation == self._generation:
+                self._loaded_at = self._checked_at
+
+    def _sync_in_background(self, app):
+        try:
+            with app.app_context():
+                self.sync()
+        except Exception:
+            app.logger.exception("Reloading the fleet index failed")
+        finally:
+            self._reload_lock.release()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._reload_lock:
+                if self._loaded_at is None:
+                    self.sync()
+            return
+
+        if self.ttl is None or time.monotonic() - self._checked_at <= self.ttl:
+            return
+        self._checked_at = time.monotonic()  # one version check per TTL, not per request
+        if fleet_version() != self._version and self._reload_lock.acquire(blocking=False):
+            threading.Thread(target=self._sync_in_background, args=(current_app._get_current_object(),),
+                             name="fleet-index-reload", daemon=True).start()
+
+    def _add(self, vehicle):
+        self._vehicles[vehicle.id] = vehicle
+        bucket = self._buckets.get(vehicle.seats)
+        if bucket is None:
+            bucket = self._buckets[vehicle.seats] = SeatBucket()
+            insort(self._seat_counts, vehicle.seats)
+        bucket.add(vehicle)
+
+    def _discard(self, vehicle_id):
+        vehicle = self._vehicles.pop(vehicle_id, None)
+        if vehicle is None:
+            return
+        bucket = self._buckets[vehicle.seats]
+        bucket.discard(vehicle)
+        if not bucket.keys:
+            del self._buckets[vehicle.seats]
+            self._seat_counts.remove(vehicle.seats)
+
+    def _apply(self, change):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(change)
+            if self._loaded_at is not None:
+                change()
+
+    def refresh(self, *vehicle_ids):
+        """
+        Re-read vehicles from the database after a committed write, e.g. a
+        reservation, a release or a lost reservation race. Deleted vehicles
+        drop out of the index.
+        The rows are read while holding the lock, so when two requests race on
+        the same vehicle the later read, which sees both commits, lands last.
+        """
+        def change():
+            rows = db.session.execute(index_rows().where(Vehicle.id.in_(vehicle_ids))).all()
+            current = {row.id: IndexedVehicle.from_row(row) for row in rows}
+            for vehicle_id in vehicle_ids:
+                self._discard(vehicle_id)
+                if vehicle_id in current:
+                    self._add(current[vehicle_id])
+        self._apply(change)
+
+    def columns(self, passengers, current_time):
+        """
+        FleetColumns of the vehicles with at least `passengers` seats that are
+        idle or free again by `current_time`, in seat order and then
+        availability order, sliced from the bucket arrays.
+        """
+        self._ensure_loaded()
+        cutoff = (as_local_naive(current_time), float("inf"))
+        vehicles, seats, hybrid = [], [], []
+        with self._lock:
+            start = bisect_left(self._seat_counts, passengers)
+            for count in self._seat_counts[start:]:
+                bucket = self._buckets[count]
+                end = bisect_right(bucket.keys, cutoff)
+                if not end:
+                    continue
+                vehicles.extend(bucket.vehicles[:end])
+                seats.append(np.full(end, count, dtype=np.int64))
+                hybrid.append(bucket.hybrid[:end])
+        if not vehicles:
+            return FleetColumns([])
+        return FleetColumns(vehicles, np.concatenate(seats), np.concatenate(hybrid))
+
+
+fleet_index = FleetIndex()
+
+
+# Keep FleetVersion moving with every transaction that writes vehicles,
+# whether through the ORM or through insert/update/delete(Vehicle) statements.
+# The counter is bumped right before COMMIT, inside the writing transaction, so
+# no worker can see the new rows with the old version. The price is that all
+# fleet writes queue on that one row while they commit; on PostgreSQL this
+# serializes the commits (not the work before them) of concurrent reservations.
+
+@event.listens_for(Session, 'do_orm_execute')
+def note_vehicle_statement(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not Vehicle or orm_execute_state.is_select:
+        return None
+    result = orm_execute_state.invoke_statement()
+    # A conditional UPDATE that matched nothing, e.g. a lost claim, changed nothing;
+    # results with RETURNING carry no row count and always count as a change
+    if getattr(result, 'rowcount', None) != 0:
+        orm_execute_state.session.info['fleet_changed'] = True
+    return result
+
+
+@event.listens_for(Session, 'before_flush')
+def note_vehicle_flush(session, flush_context, instances):
+    if any(isinstance(obj, Vehicle) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['fleet_changed'] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def bump_fleet_version(session):
+    session.flush()
+    if session.info.pop('fleet_changed', False):
+        session.info['fleet_version'] = session.execute(
+            update(FleetVersion).where(FleetVersion.id == 1)
+            .values(version=FleetVersion.version + 1)
+            .returning(FleetVersion.version)
+        ).scalar()
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_fleet_version(session):
+    version = session.info.pop('fleet_version', None)
+    if version is not None:
+        fleet_index.note_committed_version(version)
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_fleet_changes(session):
+    session.info.pop('fleet_changed', None)
+    session.info.pop('fleet_version', None)
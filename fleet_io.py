@@ -0,0 +1,251 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+import click
+import pytz
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Vehicle
+from fleet_index import fleet_index
+from cache import combinations_cache
+
+# Columns accepted on import, in CSV header order
+IMPORT_COLUMNS = ['fuel_type', 'range', 'distance', 'seats', 'license_plate_number',
+                  'car_brand', 'driver_name', 'on_route']
+EXPORT_COLUMNS = ['id'] + IMPORT_COLUMNS + ['available_from']
+
+TRUE_VALUES = {'true', '1', 'yes', 'y'}
+FALSE_VALUES = {'false', '0', 'no', 'n', ''}
+
+
+def _text(stream, **options):
+    """
+    Decode a binary stream as UTF-8, skipping a leading BOM. Invalid bytes are
+    kept as lone surrogates, so a bad row can be reported instead of failing
+    the whole stream.
+    """
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', errors='surrogateescape', **options)
+
+
+def _invalid_utf8(values):
+    for value in values:
+        for part in value if isinstance(value, list) else [value]:
+            if isinstance(part, str):
+                try:
+                    part.encode('utf-8')
+                except UnicodeEncodeError:
+                    return True
+    return False
+
+
+def read_csv(stream):
+    """
+    Yield (row_number, record) pairs from a binary CSV stream with a header line.
+    Rows with bytes that are not valid UTF-8 are yielded as the error message.
+    """
+    reader = csv.DictReader(_text(stream, newline=''))
+    for row_number, record in enumerate(reader, start=1):
+        if _invalid_utf8(record.values()):
+            yield row_number, "Invalid UTF-8"
+        else:
+            yield row_number, record
+
+
+def read_ndjson(stream):
+    """
+    Yield (row_number, record) pairs from a binary stream with one JSON object per line.
+    Lines that are not valid UTF-8 or JSON are yielded as the error message.
+    """
+    row_number = 0
+    for line in _text(stream):
+        if not line.strip():
+            continue
+        row_number += 1
+        if _invalid_utf8([line]):
+            yield row_number, "Invalid UTF-8"
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as error:
+            yield row_number, f"Invalid JSON: {error}"
+
+
+def _as_int(value, name, minimum):
+    # JSON booleans and fractions (2.9 seats) are rejected rather than truncated
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"'{name}' must be an integer")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer")
+    if number < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}")
+    return number
+
+
+def _as_bool(value, name):
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"'{name}' must be true or false")
+
+
+def validate(record):
+    """
+    Turn one imported record into column values for an INSERT.
+    Raises ValueError with a message for the per-row error report.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(record if isinstance(record, str) else "Each row must be an object")
+
+    values = {}
+    for name in ('fuel_type', 'license_plate_number', 'car_brand', 'driver_name'):
+        value = record.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{name}' is required")
+        values[name] = value.strip()
+
+    values['range'] = _as_int(record.get('range'), 'range', 0)
+    values['distance'] = _as_int(record.get('distance', 0), 'distance', 0)
+    values['seats'] = _as_int(record.get('seats'), 'seats', 1)
+    values['on_route'] = _as_bool(record.get('on_route'), 'on_route')
+    return values
+
+
+def _insert_one_by_one(rows):
+    """
+    Insert rows in their own transactions to find the ones the database rejects.
+    Returns (inserted, errors).
+    """
+    inserted, errors = 0, []
+    for row_number, values in rows:
+        try:
+            db.session.execute(insert(Vehicle), [values])
+            db.session.commit()
+            inserted += 1
+        except IntegrityError:
+            db.session.rollback()
+            errors.append({'row': row_number, 'error': 'License plate number already exists'})
+    return inserted, errors
+
+
+def import_vehicles(records, chunk_size=None):
+    """
+    Validate and insert vehicles from an iterable of (row_number, record) pairs.
+    Every chunk is inserted with a single executemany and committed as one transaction.
+    If the database rejects a chunk (e.g. a plate that already exists),
+    only that chunk is retried row by row.
+    Returns a report with the inserted count and per-row errors.
+    """
+    chunk_size = chunk_size or current_app.config['BULK_IMPORT_CHUNK_SIZE']
+    eet = pytz.timezone("Europe/Bucharest")
+    available_from = datetime.now(tz=eet)
+
+    inserted, errors, seen_plates = 0, [], set()
+    records = iter(records)
+    while True:
+        batch = list(islice(records, chunk_size))
+        if not batch:
+            break
+
+        chunk = []
+        for row_number, record in batch:
+            try:
+                values = validate(record)
+            except ValueError as error:
+                errors.append({'row': row_number, 'error': str(error)})
+                continue
+            if values['license_plate_number'] in seen_plates:
+                errors.append({'row': row_number, 'error': 'Duplicate license plate number in import'})
+                continue
+            seen_plates.add(values['license_plate_number'])
+            values['available_from'] = available_from
+            chunk.append((row_number, values))
+
+        if not chunk:
+            continue
+
+        try:
+            db.session.execute(insert(Vehicle), [values for _, values in chunk])
+            db.session.commit()
+            inserted += len(chunk)
+        except IntegrityError:
+            db.session.rollback()
+            chunk_inserted, chunk_errors = _insert_one_by_one(chunk)
+            inserted += chunk_inserted
+            errors.extend(chunk_errors)
+
+    if inserted:
+        fleet_index.invalidate()
+        combinations_cache.bump_version()
+    errors.sort(key=lambda error: error['row'])
+    return {'inserted': inserted, 'failed': len(errors), 'errors': errors}
+
+
+def export_vehicles(fmt):
+    """
+    Stream the vehicle table as CSV or NDJSON lines, in ID order.
+    """
+    rows = db.session.execute(
+        select(*(getattr(Vehicle, name) for name in EXPORT_COLUMNS))
+        .order_by(Vehicle.id)
+        .execution_options(yield_per=current_app.config['BULK_IMPORT_CHUNK_SIZE'])
+    )
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow(row[:-1] + (row.available_from.strftime("%Y-%m-%d %H:%M:%S"),))
+            if buffer.tell() > 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for row in rows:
+            record = row._asdict()
+            record['available_from'] = record['available_from'].strftime("%Y-%m-%d %H:%M:%S")
+            yield json.dumps(record) + '\n'
+
+
+@click.command('import-fleet')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Input format. Guessed from the file extension if omitted.')
+@click.option('--chunk-size', type=int, help='Rows per INSERT transaction.')
+@with_appcontext
+def import_fleet_command(path, fmt, chunk_size):
+    """Import vehicles from a CSV or NDJSON file."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    with open(path, 'rb') as stream:
+        records = read_csv(stream) if fmt == 'csv' else read_ndjson(stream)
+        report = import_vehicles(records, chunk_size)
+
+    for error in report['errors']:
+        click.echo(f"Row {error['row']}: {error['error']}", err=True)
+    click.echo(f"Imported {report['inserted']} vehicles, {report['failed']} rows failed.")
+
+
+@click.command('export-fleet')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Output format. Guessed from the file extension if omitted.')
+@with_appcontext
+def export_fleet_command(path, fmt):
+    """Export all vehicles to a CSV or NDJSON file."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        for part in export_vehicles(fmt):
+            output.write(part)
+    click.echo(f"Exported the fleet to {path}.")
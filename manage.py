@@ -0,0 +1,13 @@
+"""
+Command line entry point for maintenance tasks, e.g.:
+
+    python manage.py import-fleet vehicles.csv
+    python manage.py export-fleet vehicles.ndjson
+"""
+from flask.cli import FlaskGroup
+from app import create_app
+
+cli = FlaskGroup(create_app=lambda: create_app({'RETURN_SCHEDULER_ENABLED': False}))
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,226 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import Response, current_app, g, has_request_context, request
+from flask_restful import marshal as restful_marshal, marshal_with as restful_marshal_with
+from flask_restful.representations.json import output_json
+from flask_restful.utils import unpack
+from sqlalchemy import event
+from models import db
+from cache import combinations_cache
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """
+    Cumulative histogram per label combination, rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name, documentation, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [count per bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            bucket = bisect_left(self.buckets, value)
+            if bucket < len(self.buckets):  # larger values only show up in +Inf
+                series[bucket] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _observe(self, labels, status, state):
+        self.latency.observe(labels + (status,), time.perf_counter() - state.request_started)
+        self.sql_queries.observe(labels, state.sql_queries)
+        self.sql_duration.observe(labels, state.sql_seconds)
+        self.serialization.observe(labels, state.get('serialization_seconds', 0.0))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {values[-1]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {values[-2]}')
+            lines.append(f'{self.name}_count{{{labels}}} {values[-1]}')
+        return lines
+
+
+class Metrics:
+    """
+    Per-request instrumentation for the Flask app.
+
+    Records endpoint latency, the number and duration of SQL statements
+    (through SQLAlchemy cursor events) and the serialization time (the
+    `marshal`/`marshal_with` below plus JSON encoding) of every request, and
+    serves them on /metrics. Each response also gets a `Server-Timing` header
+    with the same split. Streamed responses are recorded once their body has
+    been sent; their `Server-Timing` only covers the time until the headers.
+
+    With `PROFILING_ENABLED`, a request sent with `X-Profile: 1` (or
+    `?profile=1`) runs under cProfile and returns the profile summary as
+    text instead of its normal body.
+    """
+
+    def __init__(self):
+        self.latency = Histogram(
+            'fleet_request_duration_seconds', 'Time spent handling a request.',
+            ('endpoint', 'method', 'status'))
+        self.sql_queries = Histogram(
+            'fleet_sql_queries_per_request', 'SQL statements executed per request.',
+            ('endpoint', 'method'), QUERY_COUNT_BUCKETS)
+        self.sql_duration = Histogram(
+            'fleet_sql_duration_seconds', 'Time spent in SQL statements per request.',
+            ('endpoint', 'method'))
+        self.serialization = Histogram(
+            'fleet_serialization_duration_seconds', 'Time spent marshalling and encoding the response.',
+            ('endpoint', 'method'))
+
+    def init_app(self, app, api):
+        app.extensions['metrics'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.render)
+        api.representation('application/json')(self._timed_output_json)
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the per-statement context, so a failing statement leaves nothing behind
+        context.query_started = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.query_started
+        # The return scheduler runs queries outside of requests
+        if has_request_context() and 'request_started' in g:
+            g.sql_queries += 1
+            g.sql_seconds += elapsed
+
+    @staticmethod
+    def _timed_output_json(data, code, headers=None):
+        started = time.perf_counter()
+        response = output_json(data, code, headers)
+        count_serialization(time.perf_counter() - started)
+        return response
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_seconds = 0.0
+        if current_app.config['PROFILING_ENABLED'] and (
+                request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _after_request(self, response):
+        if 'request_started' not in g:
+            return response
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+        elapsed = time.perf_counter() - g.request_started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        serialization = g.get('serialization_seconds', 0.0)
+
+        if endpoint != '/metrics':
+            labels, status, state = (endpoint, request.method), str(response.status_code), g._get_current_object()
+            if response.is_streamed and profiler is None:
+                # NDJSON and export bodies are generated (and query) after this hook
+                response.call_on_close(lambda: self._observe(labels, status, state))
+            else:
+                self._observe(labels, status, state)
+
+        response.headers['Server-Timing'] = (
+            f'db;desc="{g.sql_queries} queries";dur={g.sql_seconds * 1000:.2f}, '
+            f'serialize;dur={serialization * 1000:.2f}, total;dur={elapsed * 1000:.2f}'
+        )
+
+        if profiler is None:
+            return response
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(
+            current_app.config['PROFILING_TOP_FUNCTIONS'])
+        profiled = Response(summary.getvalue(), mimetype='text/plain')
+        profiled.headers['X-Profiled-Status'] = str(response.status_code)
+        profiled.headers['Server-Timing'] = response.headers['Server-Timing']
+        return profiled
+
+    def _observe(self, labels, status, state):
+        self.latency.observe(labels + (status,), time.perf_counter() - state.request_started)
+        self.sql_queries.observe(labels, state.sql_queries)
+        self.sql_duration.observe(labels, state.sql_seconds)
+        self.serialization.observe(labels, state.get('serialization_seconds', 0.0))
+
+    def render(self):
+        lines = []
+        for histogram in (self.latency, self.sql_queries, self.sql_duration, self.serialization):
+            lines.extend(histogram.render())
+
+        stats = combinations_cache.stats()
+        for name in ('hits', 'misses', 'evictions', 'expirations'):
+            if stats[name] is None:
+                continue  # not tracked by the shared Redis backend
+            lines.append(f'# TYPE fleet_combinations_cache_{name}_total counter')
+            lines.append(f'fleet_combinations_cache_{name}_total {stats[name]}')
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+metrics = Metrics()
+
+
+def count_serialization(seconds):
+    """
+    Add `seconds` to the serialization time of the current request, if any.
+    """
+    if has_request_context():
+        g.serialization_seconds = g.get('serialization_seconds', 0.0) + seconds
+
+
+def marshal(data, fields, envelope=None):
+    """
+    flask_restful.marshal, timed as serialization of the current request.
+    """
+    started = time.perf_counter()
+    try:
+        return restful_marshal(data, fields, envelope)
+    finally:
+        count_serialization(time.perf_counter() - started)
+
+
+class marshal_with(restful_marshal_with):
+    """
+    flask_restful.marshal_with, timed as serialization of the current request.
+    """
+
+    def __call__(self, f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            response = f(*args, **kwargs)
+            if isinstance(response, tuple):
+                data, code, headers = unpack(response)
+                return marshal(data, self.fields, self.envelope), code, headers
+            return marshal(response, self.fields, self.envelope)
+        return wrapper
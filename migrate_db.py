@@ -0,0 +1,27 @@
+"""
+Bring an existing database (e.g. instance/vehicle_fleet.db) up to the current schema.
+Creates missing tables and indexes, switches SQLite to WAL and refreshes the
+query planner statistics. Safe to run more than once.
+
+    python migrate_db.py
+"""
+from sqlalchemy import text
+from app import create_app
+from models import db, Vehicle
+
+app = create_app({'RETURN_SCHEDULER_ENABLED': False})
+
+with app.app_context():
+    db.create_all()  # Tables that don't exist yet, with their indexes
+
+    # create_all() skips tables that already exist, so add their new indexes here
+    for index in Vehicle.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+        print(f"Index {index.name} is in place")
+
+    with db.engine.begin() as connection:
+        if db.engine.dialect.name == 'sqlite':
+            # WAL is stored in the database file, so this only has to happen once
+            mode = connection.execute(text('PRAGMA journal_mode=WAL')).scalar()
+            print(f"SQLite journal mode: {mode}")
+        connection.execute(text('ANALYZE'))
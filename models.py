@@ -1,11 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index, event
 
 db = SQLAlchemy()
 
 class Vehicle(db.Model):
+    __table_args__ = (
+        # Free vehicles by seat count, in availability order (/combinations access path)
+        Index('ix_vehicle_availability', 'on_route', 'seats', 'available_from'),
+        # Trips that have ended (return scheduler)
+        Index('ix_vehicle_on_route_available_from', 'on_route', 'available_from'),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     fuel_type: Mapped[str] = mapped_column(nullable=False)
     range: Mapped[int] = mapped_column(nullable=False)
@@ -16,3 +23,48 @@ class Vehicle(db.Model):
     driver_name: Mapped[str] = mapped_column(nullable=False)
     on_route: Mapped[bool] = mapped_column(nullable=False)
     available_from: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    @classmethod
+    def available_at(cls, moment):
+        """
+        SQL condition for vehicles that can take a new trip at `moment`.
+        """
+        return (cls.on_route == False) | (cls.available_from <= moment)
+
+
+class FleetVersion(db.Model):
+    """
+    Single-row counter that goes up in every transaction writing to the vehicle table.
+    Workers compare it with the version their fleet index was loaded at (see fleet_index.py).
+    """
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+@event.listens_for(FleetVersion.__table__, 'after_create')
+def insert_first_fleet_version(target, connection, **kw):
+    connection.execute(target.insert().values(id=1, version=0))
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run the given PRAGMA statements on every new connection of a SQLite engine.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def configure_engine(app):
+    """
+    Apply the SQLITE_PRAGMAS from the config to every new SQLite connection.
+    Call after `db.init_app(app)`.
+    """
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
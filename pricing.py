@@ -0,0 +1,173 @@
+import numpy as np
+
+# Trips up to this many km count as city trips
+CITY_LIMIT_KM = 50
+HYBRID = "hybrid"
+
+# Tariffs in EUR
+PRICE_PER_KM = 2
+PRICE_PER_HALF_HOUR = 2
+COST_PER_KM = 2
+HYBRID_COST_PER_KM = 1
+
+
+def travel_time(distance):
+    """
+    Minutes needed for a trip: 2 min/km in the city, 1 min/km outside of it.
+    """
+    return distance * 2 if distance <= CITY_LIMIT_KM else distance
+
+
+def trip_plan(distance, fuel_type):
+    """
+    Travel time and driven distance of a single vehicle.
+    Hybrids inside the city only count every second kilometer.
+    """
+    if distance <= CITY_LIMIT_KM and fuel_type == HYBRID:
+        return travel_time(distance), distance * 0.5
+    return travel_time(distance), distance
+
+
+def hybrid_flags(vehicles):
+    """
+    Boolean array telling which of `vehicles` are hybrids.
+    """
+    return np.fromiter((v.fuel_type == HYBRID for v in vehicles), dtype=bool, count=len(vehicles))
+
+
+class FleetColumns:
+    """
+    Column-wise snapshot of a list of vehicles, used to price a whole fleet
+    with NumPy instead of one vehicle at a time.
+    """
+
+    def __init__(self, vehicles, seats=None, hybrid=None):
+        """
+        Pass `seats` and `hybrid` when the arrays are already at hand
+        (e.g. cached by the fleet index) to skip the per-vehicle pass.
+        """
+        self.vehicles = list(vehicles)
+        if seats is None:
+            seats = np.fromiter((v.seats for v in self.vehicles), dtype=np.int64,
+                                count=len(self.vehicles))
+        if hybrid is None:
+            hybrid = hybrid_flags(self.vehicles)
+        self.seats = seats
+        self.hybrid = hybrid
+
+    def __len__(self):
+        return len(self.vehicles)
+
+
+def price_fleet(hybrid, distance):
+    """
+    Price one trip of `distance` km for every vehicle described by the boolean
+    `hybrid` array. Returns the travel time and per-vehicle column arrays.
+    """
+    minutes = travel_time(distance)
+    half_hours = -(-minutes // 30)  # every started half hour is charged
+
+    discounted = hybrid & (distance <= CITY_LIMIT_KM)
+    actual_distance = np.where(discounted, distance * 0.5, float(distance))
+    revenue = actual_distance * PRICE_PER_KM + half_hours * PRICE_PER_HALF_HOUR
+    costs = actual_distance * np.where(hybrid, HYBRID_COST_PER_KM, COST_PER_KM)
+
+    return minutes, {
+        'actual_distance': actual_distance,
+        'revenue': revenue,
+        'costs': costs,
+        'profit': revenue - costs,
+        'discounted': discounted,
+    }
+
+
+def current_status(vehicle):
+    return ('Available now' if not vehicle.on_route
+            else f'Available from {vehicle.available_from.strftime("%Y-%m-%d %H:%M:%S")}')
+
+
+def _number(value, as_float):
+    # Keep the JSON types of the scalar formulas: only discounted hybrid
+    # trips produce fractional kilometers.
+    return value if as_float else int(value)
+
+
+def top_order(profit, k):
+    """
+    Indices of the `k` most profitable entries, best first.
+    Ties keep their original order, so pages of the same ranking never overlap.
+    Uses a partial selection instead of sorting the whole array.
+    """
+    size = len(profit)
+    if k >= size:
+        return np.argsort(-profit, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    threshold = np.partition(profit, size - k)[size - k]
+    above = np.flatnonzero(profit > threshold)
+    ties = np.flatnonzero(profit == threshold)[:k - len(above)]
+    chosen = np.concatenate((above, ties))
+    return chosen[np.argsort(-profit[chosen], kind='stable')]
+
+
+def vehicle_row(vehicle, minutes, actual_distance, revenue, costs, profit, discounted):
+    """
+    Response row of one priced vehicle, as listed by GET /combinations.
+    """
+    return {
+        'license_plate': vehicle.license_plate_number,
+        'car_brand': vehicle.car_brand,
+        'fuel_type': vehicle.fuel_type,
+        'seats': vehicle.seats,
+        'travel_time_minutes': minutes,
+        'actual_distance': _number(actual_distance, discounted),
+        'revenue': _number(revenue, discounted),
+        'costs': _number(costs, discounted),
+        'profit': _number(profit, discounted),
+        'current_status': current_status(vehicle)
+    }
+
+
+def count_candidates(columns, passengers):
+    """
+    Number of vehicles in `columns` with enough seats for `passengers`.
+    """
+    return int(np.count_nonzero(columns.seats >= passengers))
+
+
+def iter_ranked(columns, passengers, distance, limit=None, offset=0):
+    """
+    Price every vehicle in `columns` with enough seats for `passengers`
+    and yield (vehicle, response row) pairs by profit, best first.
+    Only the requested `offset`/`limit` window is turned into rows.
+    """
+    candidates = np.flatnonzero(columns.seats >= passengers)
+    minutes, priced = price_fleet(columns.hybrid[candidates], distance)
+    stop = len(candidates) if limit is None else offset + limit
+    order = top_order(priced['profit'], stop)[offset:]
+
+    actual_distance = priced['actual_distance'][order].tolist()
+    revenue = priced['revenue'][order].tolist()
+    costs = priced['costs'][order].tolist()
+    profit = priced['profit'][order].tolist()
+    discounted = priced['discounted'][order].tolist()
+
+    for row, position in enumerate(candidates[order].tolist()):
+        vehicle = columns.vehicles[position]
+        yield vehicle, vehicle_row(vehicle, minutes, actual_distance[row], revenue[row],
+                                   costs[row], profit[row], discounted[row])
+
+
+def iter_combinations(columns, passengers, distance, limit=None, offset=0):
+    """
+    Response rows of `iter_ranked`.
+    """
+    return (row for _, row in iter_ranked(columns, passengers, distance, limit, offset))
+
+
+def rank_combinations(columns, passengers, distance, limit=None, offset=0):
+    """
+    List version of `iter_combinations`.
+    """
+    return list(iter_combinations(columns, passengers, distance, limit, offset))
@@ -1,16 +1,82 @@
-import math
+import json
 import pytz
 from datetime import datetime
-from flask import request
+from flask import Response, current_app, request, stream_with_context
 from flask_restful import Resource
-from models import Vehicle
+from fleet_index import fleet_index
+from cache import combinations_cache
+from pricing import count_candidates, iter_combinations, rank_combinations
+from combination_solver import rank_sets
+
+NDJSON = 'application/x-ndjson'
+
+
+def as_integer(value):
+    """
+    int() for query string and JSON values; JSON booleans and floats are rejected
+    instead of being truncated.
+    """
+    if isinstance(value, (bool, float)):
+        raise ValueError(value)
+    return int(value)
+
+
+def parse_window(source):
+    """
+    Read the optional 'limit' and 'offset' paging parameters.
+    Returns (limit, offset, error_message).
+    """
+    limit = source.get('limit')
+    offset = source.get('offset', 0)
+    try:
+        limit = None if limit is None else as_integer(limit)
+        offset = as_integer(offset)
+    except (TypeError, ValueError):
+        return None, 0, "'limit' and 'offset' must be integers"
+    if (limit is not None and limit < 1) or offset < 0:
+        return None, 0, "'limit' must be positive and 'offset' must not be negative"
+    return limit, offset, None
+
+
+def ndjson_lines(request_details, rows):
+    """
+    One JSON document per line: the request details first, then one per vehicle.
+    """
+    yield json.dumps({'request_details': request_details}) + '\n'
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def combinations_body(request_details, columns, passengers, distance, limit, offset):
+    """
+    JSON body of GET /combinations for an already loaded fleet snapshot.
+    """
+    body = {
+        'request_details': request_details,
+        'possible_combinations': rank_combinations(columns, passengers, distance, limit, offset)
+    }
+    if limit is not None or offset:
+        body['pagination'] = {
+            'limit': limit,
+            'offset': offset,
+            'total': count_candidates(columns, passengers)
+        }
+    return body
+
+
+def wants_ndjson():
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON
+
 
 class BestCombination(Resource):
     def get(self):
         """
         Get the best combination and profits for each ride.
-        Query parameters: 'passengers' (int), 'distance' (int)
-        Example: GET /combinations?passengers=4&distance=75
+        Query parameters: 'passengers' (int), 'distance' (int),
+        optional 'limit' (int), 'offset' (int) and 'format' ('json' or 'ndjson')
+        Example: GET /combinations?passengers=4&distance=75&limit=5
         """
         passengers = request.args.get('passengers', type=int)
         distance = request.args.get('distance', type=int)
@@ -18,58 +84,152 @@ class BestCombination(Resource):
         if not passengers or not distance:
             return {"message": "Please provide both passengers and distance parameters"}, 400
 
+        limit, offset, error = parse_window(request.args)
+        if error:
+            return {"message": error}, 400
+
+        streaming = wants_ndjson()
+        cache_key = None
+        if not streaming and combinations_cache.enabled:
+            cache_key = combinations_cache.key((passengers, distance, limit, offset))
+            cached = combinations_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        eet = pytz.timezone("Europe/Bucharest")
+        current_time = datetime.now(tz=eet)
+
+        # Only vehicles with enough seats that are free by now
+        columns = fleet_index.columns(passengers, current_time)
+
+        request_details = {
+            'passengers': passengers,
+            'distance': distance,
+            'query_time': current_time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        if streaming:
+            rows = iter_combinations(columns, passengers, distance, limit, offset)
+            return Response(stream_with_context(ndjson_lines(request_details, rows)), mimetype=NDJSON)
+
+        response = combinations_body(request_details, columns, passengers, distance, limit, offset)
+        if cache_key is not None:
+            combinations_cache.set(cache_key, response)
+        return response
+
+
+class BestCombinationBatch(Resource):
+    def post(self):
+        """
+        Score many trips against one snapshot of the available fleet.
+        Body (JSON): {"trips": [{"passengers": 4, "distance": 75}, ...], "limit": 3}
+        'limit' caps the vehicles returned per trip (COMBINATIONS_BATCH_LIMIT by default).
+        Example: POST /combinations/batch
+        """
+        body = request.get_json(silent=True) or {}
+        trips = body.get('trips')
+
+        if not isinstance(trips, list) or not trips:
+            return {"message": "Please provide a non-empty 'trips' list"}, 400
+
+        max_trips = current_app.config['COMBINATIONS_BATCH_MAX_TRIPS']
+        if len(trips) > max_trips:
+            return {"message": f"At most {max_trips} trips can be scored per request"}, 400
+
+        for position, trip in enumerate(trips):
+            if not isinstance(trip, dict) or not all(
+                    type(trip.get(key)) is int and trip[key] > 0 for key in ('passengers', 'distance')):
+                return {"message": f"Trip {position} needs positive integer passengers and distance"}, 400
+
+        limit, offset, error = parse_window(body)
+        if error:
+            return {"message": error}, 400
+        max_limit = current_app.config['COMBINATIONS_BATCH_MAX_LIMIT']
+        if limit is None:
+            limit = current_app.config['COMBINATIONS_BATCH_LIMIT']
+        elif limit > max_limit:
+            return {"message": f"'limit' can be at most {max_limit} vehicles per trip"}, 400
+
         eet = pytz.timezone("Europe/Bucharest")
         current_time = datetime.now(tz=eet)
 
-        fleet = Vehicle.query.filter(
-            (Vehicle.on_route == False) |
-            (Vehicle.available_from <= current_time)
-        ).all()
-
-        combinations = []
-        for vehicle in fleet:
-            # Must have enough seats for passengers
-            if vehicle.seats >= passengers:
-                if distance <= 50:
-                    travel_time = distance * 2  # 2 minutes per km
-                    # For hybrid, half the distance is electric or some custom logic
-                    actual_distance = distance * 0.5 if vehicle.fuel_type == "hybrid" else distance
-                else:
-                    travel_time = distance  # 1 minute per km
-                    actual_distance = distance
-
-                half_hours = math.ceil(travel_time / 30)
-                km_revenue = actual_distance * 2
-                time_revenue = half_hours * 2
-                total_revenue = km_revenue + time_revenue
-
-                km_cost = actual_distance * (1 if vehicle.fuel_type == "hybrid" else 2)
-                profit = total_revenue - km_cost
-
-                status = ('Available now' if not vehicle.on_route
-                          else f'Available from {vehicle.available_from.strftime("%Y-%m-%d %H:%M:%S")}')
-
-                combinations.append({
-                    'license_plate': vehicle.license_plate_number,
-                    'car_brand': vehicle.car_brand,
-                    'fuel_type': vehicle.fuel_type,
-                    'seats': vehicle.seats,
-                    'travel_time_minutes': travel_time,
-                    'actual_distance': actual_distance,
-                    'revenue': total_revenue,
-                    'costs': km_cost,
-                    'profit': profit,
-                    'current_status': status
-                })
-
-        # Sort by profit descending
-        combinations.sort(key=lambda x: x['profit'], reverse=True)
+        # One snapshot that covers the smallest group; larger groups are masked per trip
+        smallest_group = min(trip['passengers'] for trip in trips)
+        columns = fleet_index.columns(smallest_group, current_time)
+
+        results = []
+        for trip in trips:
+            results.append({
+                'request_details': {
+                    'passengers': trip['passengers'],
+                    'distance': trip['distance']
+                },
+                'possible_combinations': rank_combinations(
+                    columns, trip['passengers'], trip['distance'], limit, offset)
+            })
 
         return {
+            'query_time': current_time.strftime("%Y-%m-%d %H:%M:%S"),
+            'results': results
+        }
+
+
+class BestCombinationSets(Resource):
+    def get(self):
+        """
+        Most profitable sets of vehicles that seat a group together, e.g. for
+        groups larger than any single car. No vehicle in a set could be left out.
+        Query parameters: 'passengers' (int), 'distance' (int),
+        optional 'limit' (int, number of sets) and 'max_vehicles' (int, per set)
+        Example: GET /combinations/sets?passengers=12&distance=60&limit=5
+        """
+        passengers = request.args.get('passengers', type=int)
+        distance = request.args.get('distance', type=int)
+
+        if not passengers or not distance:
+            return {"message": "Please provide both passengers and distance parameters"}, 400
+
+        config = current_app.config
+        try:
+            limit = int(request.args.get('limit', config['COMBINATION_SETS_LIMIT']))
+            max_vehicles = int(request.args.get('max_vehicles', config['COMBINATION_SETS_MAX_VEHICLES']))
+        except ValueError:
+            return {"message": "'limit' and 'max_vehicles' must be integers"}, 400
+        if not 1 <= limit <= config['COMBINATION_SETS_MAX_LIMIT']:
+            return {"message": f"'limit' must be between 1 and {config['COMBINATION_SETS_MAX_LIMIT']}"}, 400
+        if not 1 <= max_vehicles <= config['COMBINATION_SETS_MAX_VEHICLES']:
+            return {"message": f"'max_vehicles' must be between 1 and {config['COMBINATION_SETS_MAX_VEHICLES']}"}, 400
+
+        cache_key = None
+        if combinations_cache.enabled:
+            cache_key = combinations_cache.key(('sets', passengers, distance, limit, max_vehicles))
+            cached = combinations_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        eet = pytz.timezone("Europe/Bucharest")
+        current_time = datetime.now(tz=eet)
+
+        # Every vehicle that is free by now can be part of a set
+        columns = fleet_index.columns(1, current_time)
+
+        response = {
             'request_details': {
                 'passengers': passengers,
                 'distance': distance,
+                'max_vehicles': max_vehicles,
                 'query_time': current_time.strftime("%Y-%m-%d %H:%M:%S")
             },
-            'possible_combinations': combinations
+            'possible_sets': rank_sets(columns, passengers, distance, limit, max_vehicles)
         }
+        if cache_key is not None:
+            combinations_cache.set(cache_key, response)
+        return response
+
+
+class CombinationCacheStats(Resource):
+    def get(self):
+        """
+        Hit, miss and eviction counters of the /combinations response cache.
+        Example: GET /combinations/cache
+        """
+        return combinations_cache.stats()
@@ -0,0 +1,48 @@
+from flask import Response, request, stream_with_context
+from flask_restful import Resource
+from fleet_io import export_vehicles, import_vehicles, read_csv, read_ndjson
+
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def requested_format(mimetype):
+    """
+    Pick 'csv' or 'ndjson' from the 'format' query parameter or the given mimetype.
+    """
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt if fmt in FORMATS else None
+    for name, value in FORMATS.items():
+        if mimetype == value:
+            return name
+    return None
+
+
+class BulkFleetImport(Resource):
+    def post(self):
+        """
+        Add many vehicles at once from a streamed CSV or NDJSON body.
+        CSV needs a header line with the same fields as POST /all/fleet.
+        E.g., POST /all/fleet/bulk with Content-Type: text/csv
+        """
+        fmt = requested_format(request.mimetype)
+        if fmt is None:
+            return {"message": "Send text/csv or application/x-ndjson, or pass format=csv|ndjson"}, 415
+
+        records = read_csv(request.stream) if fmt == 'csv' else read_ndjson(request.stream)
+        report = import_vehicles(records)
+        return report, 201 if report['inserted'] else 400
+
+
+class FleetExport(Resource):
+    def get(self):
+        """
+        Stream the whole fleet as CSV or NDJSON.
+        Query parameter: 'format' ('csv' or 'ndjson', default 'ndjson')
+        E.g., GET /all/fleet/export?format=csv
+        """
+        fmt = requested_format(request.accept_mimetypes.best) or 'ndjson'
+        if request.args.get('format') and request.args['format'] not in FORMATS:
+            return {"message": "Unsupported format, use csv or ndjson"}, 400
+
+        return Response(stream_with_context(export_vehicles(fmt)), mimetype=FORMATS[fmt])
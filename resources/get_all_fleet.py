@@ -1,8 +1,13 @@
 from datetime import datetime
 import pytz
-from flask_restful import Resource, reqparse, marshal_with, fields
-from flask import request
+from flask_restful import Resource, reqparse, fields
+from flask import current_app, request
+from sqlalchemy import select
 from models import db, Vehicle
+from fleet_index import fleet_index
+from cache import combinations_cache
+from metrics import marshal, marshal_with
+from resources.best_combination import as_integer
 
 # Specify the output fields for marshalling
 fleet_vehicles = {
@@ -30,27 +35,94 @@ vehicle_args.add_argument('car_brand', type=str, help='Brand of the car.')
 vehicle_args.add_argument('driver_name', type=str, help='Name of the driver.')
 vehicle_args.add_argument('on_route', type=bool, help='Is it occupied for the time being?')
 
+def fleet_projection(requested):
+    """
+    Marshalling fields for a comma separated 'fields' parameter.
+    Returns (projection, error_message).
+    """
+    if not requested:
+        return fleet_vehicles, None
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in fleet_vehicles]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    return {name: fleet_vehicles[name] for name in names}, None
+
+
+def parse_fleet_page(source, config):
+    """
+    Read the 'after_id' and 'limit' paging parameters of GET /all/fleet.
+    Returns (after_id, limit, error_message).
+    """
+    try:
+        after_id = as_integer(source.get('after_id', 0))
+        limit = as_integer(source.get('limit', config['FLEET_PAGE_SIZE']))
+    except (TypeError, ValueError):
+        return 0, 0, "'after_id' and 'limit' must be integers"
+    if after_id < 0:
+        return 0, 0, "'after_id' must not be negative"
+    if not 1 <= limit <= config['FLEET_PAGE_MAX_SIZE']:
+        return 0, 0, f"'limit' must be between 1 and {config['FLEET_PAGE_MAX_SIZE']}"
+    return after_id, limit, None
+
+
+def fleet_page_statement(projection, after_id, limit):
+    """
+    SELECT for one page of the fleet, loading only the columns we return
+    plus what paging and availability need.
+    """
+    loaded = set(projection) | {'id'}
+    if 'available_from' in loaded:
+        loaded.add('on_route')
+    return (
+        select(*(getattr(Vehicle, name) for name in fleet_vehicles if name in loaded))
+        .where(Vehicle.id > after_id)
+        .order_by(Vehicle.id)
+        .limit(limit)
+    )
+
+
+def fleet_page(rows, projection, limit):
+    """
+    Marshal one page of rows. Returns (body, headers).
+    """
+    eet = pytz.timezone("Europe/Bucharest")
+    available_now = datetime.now(tz=eet).replace(tzinfo=None)
+
+    page = []
+    for row in rows:
+        vehicle = row._asdict()
+        if 'available_from' in vehicle and not vehicle['on_route']:
+            vehicle['available_from'] = available_now
+        page.append(vehicle)
+
+    headers = {}
+    if len(rows) == limit:
+        headers['X-Next-After-Id'] = str(rows[-1].id)
+
+    return marshal(page, projection), headers
+
+
 class GetAllFleet(Resource):
-    @marshal_with(fleet_vehicles)
     def get(self):
         """
-        Retrieve a list of all vehicles in the fleet.
-        If on_route == False, set available_from to the current time in EET.
+        Retrieve one page of vehicles in the fleet, ordered by ID.
+        Query parameters: 'after_id' (int), 'limit' (int), 'fields' (comma separated)
+        Example: GET /all/fleet?after_id=100&limit=50&fields=id,seats,on_route
+        Vehicles that are not on route are reported as available from the
+        current time in EET; nothing is written back to the database.
         """
-        eet = pytz.timezone("Europe/Bucharest")
-        current_time = datetime.now(tz=eet)
+        after_id, limit, error = parse_fleet_page(request.args, current_app.config)
+        if error:
+            return {"message": error}, 400
 
-        whole_fleet = Vehicle.query.all()
-
-        # Update `available_from` for vehicles that are not on_route
-        for vehicle in whole_fleet:
-            if not vehicle.on_route:
-                vehicle.available_from = current_time
-
-        # Persist these changes so next time we query, they're updated
-        db.session.commit()
+        projection, error = fleet_projection(request.args.get('fields'))
+        if error:
+            return {"message": error}, 400
 
-        return whole_fleet, 200
+        rows = db.session.execute(fleet_page_statement(projection, after_id, limit)).all()
+        body, headers = fleet_page(rows, projection, limit)
+        return body, 200, headers
 
     @marshal_with(fleet_vehicles)
     def post(self):
@@ -76,6 +148,8 @@ class GetAllFleet(Resource):
 
         db.session.add(new_vehicle)
         db.session.commit()
+        fleet_index.refresh(new_vehicle.id)
+        combinations_cache.bump_version()
         return new_vehicle, 201
 
     @marshal_with(fleet_vehicles)
@@ -102,6 +176,8 @@ class GetAllFleet(Resource):
 
         vehicle.available_from = available_from
         db.session.commit()
+        fleet_index.refresh(vehicle.id)
+        combinations_cache.bump_version()
         return vehicle, 200
 
     @marshal_with(fleet_vehicles)
@@ -120,6 +196,9 @@ class GetAllFleet(Resource):
         if not vehicle:
             return {"message": "Vehicle not found."}, 404
 
+        vehicle_id = vehicle.id
         db.session.delete(vehicle)
         db.session.commit()
+        fleet_index.refresh(vehicle_id)
+        combinations_cache.bump_version()
         return {"message": f"Vehicle with ID {args.get('id') or args['license_plate_number']} has been deleted."}, 200
@@ -0,0 +1,44 @@
+import pytz
+from datetime import datetime
+from flask import current_app, request
+from flask_restful import Resource
+from fleet_index import fleet_index
+from pricing import iter_ranked
+from resources.select_vehicle import claim_vehicle
+
+class ReserveBestVehicle(Resource):
+    def put(self):
+        """
+        Reserve the most profitable available vehicle for a trip in one call.
+        Query parameters: 'passengers' (int), 'distance' (int)
+        Example: PUT /reserve?passengers=4&distance=75
+        """
+        passengers = request.args.get('passengers', type=int)
+        distance = request.args.get('distance', type=int)
+
+        if not passengers or not distance:
+            return {"message": "Please provide both passengers and distance parameters"}, 400
+
+        eet = pytz.timezone("Europe/Bucharest")
+        current_time = datetime.now(tz=eet)
+
+        columns = fleet_index.columns(passengers, current_time)
+        if not len(columns):
+            return {"message": "No available vehicle for this trip"}, 404
+
+        attempts = current_app.config['RESERVE_MAX_ATTEMPTS']
+
+        # Walk down the ranking until a claim succeeds; losing a race only costs one UPDATE
+        for vehicle, combination in iter_ranked(columns, passengers, distance, limit=attempts):
+            trip_details = claim_vehicle(vehicle.id, combination['fuel_type'], distance)
+            if trip_details is None:
+                fleet_index.refresh(vehicle.id)
+                continue
+
+            return {
+                "message": f"Vehicle {combination['license_plate']} has been set on route",
+                "vehicle": combination,
+                "trip_details": trip_details
+            }, 200
+
+        return {"message": "All candidate vehicles were taken, please retry"}, 409
@@ -1,9 +1,62 @@
 from flask import request
 from flask_restful import Resource
+from sqlalchemy import update
 from models import db, Vehicle
+from fleet_index import fleet_index
+from cache import combinations_cache
+from pricing import trip_plan
+from scheduler import schedule_return
 from datetime import datetime, timedelta
 import pytz
 
+
+def claim_statement(vehicle_id, fuel_type, distance):
+    """
+    Conditional UPDATE that puts a vehicle on route for a trip of `distance` km,
+    but only if it is still available.
+    Returns (statement, trip_details, available_time).
+    """
+    travel_time, actual_distance = trip_plan(distance, fuel_type)
+
+    eet = pytz.timezone("Europe/Bucharest")
+    current_time = datetime.now(tz=eet)
+    available_time = current_time + timedelta(minutes=travel_time)
+
+    statement = (
+        update(Vehicle)
+        .where(Vehicle.id == vehicle_id, Vehicle.available_at(current_time))
+        .values(on_route=True, available_from=available_time)
+        .execution_options(synchronize_session=False)
+    )
+    trip_details = {
+        "start_time": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "travel_time_minutes": travel_time,
+        "actual_distance": actual_distance,
+        "will_be_available": available_time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    return statement, trip_details, available_time
+
+
+def claim_vehicle(vehicle_id, fuel_type, distance):
+    """
+    Atomically put a vehicle on route for a trip of `distance` km.
+    The availability check and the write happen in one conditional UPDATE,
+    so concurrent dispatchers can never book the same vehicle twice.
+    Returns the trip details, or None if the vehicle was no longer available.
+    """
+    statement, trip_details, available_time = claim_statement(vehicle_id, fuel_type, distance)
+    result = db.session.execute(statement)
+    if result.rowcount != 1:
+        db.session.rollback()
+        return None
+    db.session.commit()
+
+    fleet_index.refresh(vehicle_id)
+    combinations_cache.bump_version()
+    schedule_return(available_time)
+    return trip_details
+
+
 class SelectVehicle(Resource):
     def put(self, license_plate_number):
         """
@@ -19,36 +72,17 @@ class SelectVehicle(Resource):
         if not vehicle:
             return {"message": "Vehicle not found"}, 404
 
-        if vehicle.on_route:
+        trip_details = claim_vehicle(vehicle.id, vehicle.fuel_type, distance)
+        if trip_details is None:
+            # Someone else holds the vehicle; the rollback expired our copy, so this is fresh
             return {
                 "message": "Vehicle is already on route",
                 "available_from": vehicle.available_from.strftime("%Y-%m-%d %H:%M:%S")
             }, 400
 
-        # Calculate travel time
-        if distance <= 50:
-            travel_time = distance * 2
-            actual_distance = distance * 0.5 if vehicle.fuel_type == "hybrid" else distance
-        else:
-            travel_time = distance
-            actual_distance = distance
-
-        eet = pytz.timezone("Europe/Bucharest")
-        current_time = datetime.now(tz=eet)
-        available_time = current_time + timedelta(minutes=travel_time)
-
-        vehicle.on_route = True
-        vehicle.available_from = available_time
-        db.session.commit()
-
         return {
             "message": f"Vehicle {license_plate_number} has been set on route",
-            "trip_details": {
-                "start_time": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "travel_time_minutes": travel_time,
-                "actual_distance": actual_distance,
-                "will_be_available": available_time.strftime("%Y-%m-%d %H:%M:%S")
-            }
+            "trip_details": trip_details
         }, 200
 
     def patch(self, license_plate_number):
@@ -66,6 +100,8 @@ class SelectVehicle(Resource):
         vehicle.on_route = False
         vehicle.available_from = current_time
         db.session.commit()
+        fleet_index.refresh(vehicle.id)
+        combinations_cache.bump_version()
 
         return {
             "message": f"Vehicle {license_plate_number} is now available",
@@ -0,0 +1,161 @@
+import heapq
+import threading
+from datetime import datetime
+
+import pytz
+from flask import current_app
+from sqlalchemy import select, update
+from models import db, Vehicle
+from fleet_index import as_local_naive, fleet_index
+from cache import combinations_cache
+
+
+class ReturnScheduler:
+    """
+    Background worker that puts vehicles back into service once their trip is over.
+
+    Trip end times are kept in a min-heap, so the worker sleeps exactly until
+    the next vehicle is due. When it wakes up, every due vehicle in the
+    database is released with batched UPDATEs, which also covers trips booked
+    by other workers. For those trips the worker never sleeps longer than
+    `RETURN_SCHEDULER_MAX_WAIT` seconds.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.max_wait = app.config['RETURN_SCHEDULER_MAX_WAIT']
+        self.batch_size = app.config['RETURN_SCHEDULER_BATCH_SIZE']
+        self._due = []  # heap of naive EET datetimes
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = None
+        app.extensions['return_scheduler'] = self
+
+    def schedule(self, available_from):
+        """
+        Remember that a vehicle becomes free at `available_from`.
+        """
+        moment = as_local_naive(available_from)
+        with self._wakeup:
+            heapq.heappush(self._due, moment)
+            if self._due[0] == moment:
+                self._wakeup.notify()
+
+    def release_due(self):
+        """
+        Release every vehicle whose trip has ended. Returns their IDs.
+        Needs an application context.
+        """
+        eet = pytz.timezone("Europe/Bucharest")
+        current_time = datetime.now(tz=eet)
+        released = []
+
+        finished = (Vehicle.on_route == True, Vehicle.available_from <= current_time)
+        while True:
+            # A plain indexed read first, so an idle tick never takes the write lock
+            due_ids = db.session.execute(
+                select(Vehicle.id).where(*finished).limit(self.batch_size)
+            ).scalars().all()
+            if not due_ids:
+                break
+
+            # Another worker may have released or re-booked some of them in the meantime
+            vehicle_ids = db.session.execute(
+                update(Vehicle)
+                .where(Vehicle.id.in_(due_ids), *finished)
+                .values(on_route=False)
+                .returning(Vehicle.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            if vehicle_ids:
+                db.session.commit()
+                fleet_index.refresh(*vehicle_ids)
+                combinations_cache.bump_version()
+                released.extend(vehicle_ids)
+            else:
+                db.session.rollback()  # nothing was released, so the fleet version stays put
+            if len(due_ids) < self.batch_size:
+                break
+
+        cutoff = as_local_naive(current_time)
+        with self._wakeup:
+            while self._due and self._due[0] <= cutoff:
+                heapq.heappop(self._due)
+        return released
+
+    def _seconds_until_next(self):
+        if not self._due:
+            return self.max_wait
+        eet = pytz.timezone("Europe/Bucharest")
+        now = as_local_naive(datetime.now(tz=eet))
+        return max(0.0, min((self._due[0] - now).total_seconds(), self.max_wait))
+
+    def _load_pending(self):
+        pending = db.session.execute(
+            select(Vehicle.available_from).where(Vehicle.on_route == True)
+        ).scalars().all()
+        with self._wakeup:
+            self._due = [as_local_naive(moment) for moment in pending]
+            heapq.heapify(self._due)
+
+    def run_forever(self):
+        loaded = False
+        while not self._stopped.is_set():
+            # Sleeping first also gives a fresh app time to create its tables
+            with self._wakeup:
+                self._wakeup.wait(self._seconds_until_next())
+            if self._stopped.is_set():
+                break
+
+            with self.app.app_context():
+                try:
+                    if not loaded:
+                        self._load_pending()
+                        loaded = True
+                    self.release_due()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Releasing finished trips failed")
+                finally:
+                    db.session.remove()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name="return-scheduler", daemon=True)
+        self._thread.start()
+
+    def start_with_first_request(self):
+        """
+        Start the worker when the app handles its first request.
+        `python app.py` and `flask run --debug` also build the app in the
+        reloader's file-watching process, which never serves a request, so
+        only the serving process sweeps the database.
+        """
+        def start():
+            if self._thread is None:
+                with self._wakeup:
+                    if self._thread is None:
+                        self.start()
+        self.app.before_request(start)
+
+    def stop(self):
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def schedule_return(available_from):
+    """
+    Tell the current app's scheduler, if it runs, about a new trip end time.
+    """
+    scheduler = current_app.extensions.get('return_scheduler')
+    if scheduler is not None:
+        scheduler.schedule(available_from)
+
+
+if __name__ == '__main__':
+    # Standalone worker, for deployments that disable the in-process scheduler
+    from app import create_app
+
+    ReturnScheduler(create_app({'RETURN_SCHEDULER_ENABLED': False})).run_forever()
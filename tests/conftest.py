@@ -0,0 +1,39 @@
+import pytest
+from app import create_app
+from models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'fleet.db'}",
+        'RETURN_SCHEDULER_ENABLED': False,
+        'DEBUG': False,
+        'TESTING': True,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def add_vehicle(client):
+    """
+    POST /all/fleet with sensible defaults; returns the created vehicle.
+    """
+    def add(plate, seats=4, fuel_type='gasoline', on_route=False):
+        response = client.post('/all/fleet', json={
+            'fuel_type': fuel_type, 'range': 500, 'distance': 0, 'seats': seats,
+            'license_plate_number': plate, 'car_brand': 'Toyota', 'driver_name': 'Test Driver',
+            'on_route': on_route,
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+        return response.get_json()
+    return add
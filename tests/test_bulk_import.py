@@ -0,0 +1,87 @@
+import json
+
+HEADER = 'fuel_type,range,distance,seats,license_plate_number,car_brand,driver_name,on_route\n'
+
+
+def ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def vehicle(plate, **changes):
+    record = {'fuel_type': 'hybrid', 'range': 500, 'distance': 0, 'seats': 4,
+              'license_plate_number': plate, 'car_brand': 'Opel', 'driver_name': 'Ana', 'on_route': False}
+    record.update(changes)
+    return record
+
+
+def test_csv_import_reports_bad_rows_and_keeps_the_rest(client, add_vehicle):
+    add_vehicle('TAKEN-1')
+    body = HEADER + (
+        'hybrid,500,0,4,CSV-1,Opel,Ana,false\n'
+        'gasoline,500,0,many,CSV-2,Opel,Ana,false\n'
+        'hybrid,500,0,4,CSV-1,Opel,Ana,false\n'
+        ',500,0,4,CSV-3,Opel,Ana,false\n'
+        'hybrid,500,0,4,TAKEN-1,Opel,Ana,false\n'
+        'gasoline,800,0,7,CSV-4,Opel,Ana,maybe\n'
+        'gasoline,800,0,7,CSV-5,Opel,Ana,yes\n'
+    )
+    response = client.post('/all/fleet/bulk', data=body, content_type='text/csv')
+
+    assert response.status_code == 201
+    report = response.get_json()
+    assert report['inserted'] == 2
+    assert report['errors'] == [
+        {'row': 2, 'error': "'seats' must be an integer"},
+        {'row': 3, 'error': 'Duplicate license plate number in import'},
+        {'row': 4, 'error': "'fuel_type' is required"},
+        {'row': 5, 'error': 'License plate number already exists'},
+        {'row': 6, 'error': "'on_route' must be true or false"},
+    ]
+    plates = {row['license_plate_number'] for row in client.get('/all/fleet').get_json()}
+    assert plates == {'TAKEN-1', 'CSV-1', 'CSV-5'}
+
+
+def test_ndjson_import_rejects_fractions_and_bad_lines(client):
+    body = ndjson(vehicle('ND-1'), vehicle('ND-2', seats=2.9), vehicle('ND-3', range=1.7),
+                  vehicle('ND-4', seats=5.0)) + '{"fuel_type": \n' + ndjson(vehicle('ND-5', seats=True))
+    response = client.post('/all/fleet/bulk', data=body, content_type='application/x-ndjson')
+
+    report = response.get_json()
+    assert report['inserted'] == 2
+    assert [error['row'] for error in report['errors']] == [2, 3, 5, 6]
+    assert report['errors'][2]['error'].startswith('Invalid JSON')
+    seats = {row['license_plate_number']: row['seats'] for row in client.get('/all/fleet').get_json()}
+    assert seats == {'ND-1': 4, 'ND-4': 5}
+
+
+def test_import_accepts_a_bom_and_reports_invalid_utf8_per_row(client):
+    body = ('﻿' + HEADER + 'hybrid,500,0,4,UTF-1,Škoda,Ana,false\n').encode() \
+        + b'hybrid,500,0,4,UTF-2,Op\xffel,Ana,false\n' \
+        + 'gasoline,500,0,4,UTF-3,Opel,"Ion\nPop",false\n'.encode()
+    response = client.post('/all/fleet/bulk', data=body, content_type='text/csv')
+
+    assert response.status_code == 201
+    assert response.get_json()['errors'] == [{'row': 2, 'error': 'Invalid UTF-8'}]
+    brands = {row['license_plate_number']: row['car_brand'] for row in client.get('/all/fleet').get_json()}
+    assert brands == {'UTF-1': 'Škoda', 'UTF-3': 'Opel'}
+
+    body = ndjson(vehicle('UTF-4')).encode() + b'{"license_plate_number": "\xc3"}\n'
+    report = client.post('/all/fleet/bulk', data=body, content_type='application/x-ndjson').get_json()
+    assert report['inserted'] == 1
+    assert report['errors'] == [{'row': 2, 'error': 'Invalid UTF-8'}]
+
+
+def test_nothing_imported_is_a_bad_request(client):
+    response = client.post('/all/fleet/bulk', data=ndjson(vehicle('BAD', seats=0)),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'row': 1, 'error': "'seats' must be at least 1"}]
+
+
+def test_imported_vehicles_are_ranked(client):
+    client.get('/combinations?passengers=1&distance=10')  # load the index first
+    client.post('/all/fleet/bulk', data=ndjson(vehicle('RANK-1'), vehicle('RANK-2', seats=2)),
+                content_type='application/x-ndjson')
+
+    rows = client.get('/combinations?passengers=3&distance=10').get_json()['possible_combinations']
+    assert [row['license_plate'] for row in rows] == ['RANK-1']
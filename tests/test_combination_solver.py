@@ -0,0 +1,63 @@
+import random
+import time
+from collections import namedtuple
+from itertools import combinations
+
+import pytest
+from pricing import FleetColumns
+from combination_solver import best_sets, rank_sets, vehicle_classes
+
+Vehicle = namedtuple('Vehicle', 'id fuel_type seats license_plate_number car_brand on_route available_from')
+
+
+def random_fleet(rng, size, max_seats):
+    return [Vehicle(number, rng.choice(('hybrid', 'gasoline')), rng.randint(1, max_seats),
+                    f'TEST-{number}', 'Toyota', False, None)
+            for number in range(size)]
+
+
+def brute_force(classes, fleet, passengers, max_vehicles):
+    """
+    Every minimal set of vehicles as (profit, sorted class keys), best first.
+    """
+    profit = {(vehicle_class.seats, vehicle_class.hybrid): vehicle_class.profit for vehicle_class in classes}
+    found = set()
+    for size in range(1, min(max_vehicles, len(fleet)) + 1):
+        for chosen in combinations(fleet, size):
+            seats = [vehicle.seats for vehicle in chosen]
+            if sum(seats) >= passengers and sum(seats) - min(seats) < passengers:
+                key = tuple(sorted((vehicle.seats, vehicle.fuel_type == 'hybrid') for vehicle in chosen))
+                found.add((sum(profit[vehicle] for vehicle in key), key))
+    return sorted(found, reverse=True)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_best_sets_match_brute_force(seed):
+    rng = random.Random(seed)
+    fleet = random_fleet(rng, rng.randint(1, 9), 8)
+    passengers, distance = rng.randint(1, 25), rng.choice((10, 60))
+    max_vehicles, limit = rng.randint(1, 6), rng.randint(1, 6)
+
+    classes, _, _ = vehicle_classes(FleetColumns(fleet), distance)
+    result = best_sets(classes, passengers, limit, max_vehicles)
+    expected = brute_force(classes, fleet, passengers, max_vehicles)
+
+    assert [profit for profit, _, _ in result] == [profit for profit, _ in expected[:limit]]
+    minimal_sets = {key for _, key in expected}
+    for profit, vehicle_count, counts in result:
+        key = tuple(sorted(
+            (vehicle_class.seats, vehicle_class.hybrid)
+            for vehicle_class, taken in zip(classes, counts) for _ in range(taken)))
+        assert key in minimal_sets
+        assert vehicle_count == len(key)
+    assert len({counts for _, _, counts in result}) == len(result)
+
+
+def test_wide_seat_range_stays_fast():
+    # Many seat classes used to make the search exponential
+    fleet = random_fleet(random.Random(3), 5000, 40)
+    started = time.perf_counter()
+    sets = rank_sets(FleetColumns(fleet), 100, 40, 50, 10)
+    assert time.perf_counter() - started < 2
+    assert len(sets) == 50
+    assert all(sum(vehicle['seats'] for vehicle in row['vehicles']) >= 100 for row in sets)
@@ -0,0 +1,83 @@
+import random
+from datetime import datetime
+
+import pytz
+from sqlalchemy import select
+from models import db, Vehicle
+from fleet_index import fleet_index, fleet_version
+
+EET = pytz.timezone("Europe/Bucharest")
+
+
+def listed_plates(client, passengers):
+    response = client.get(f'/combinations?passengers={passengers}&distance=20')
+    assert response.status_code == 200
+    return sorted(row['license_plate'] for row in response.get_json()['possible_combinations'])
+
+
+def database_plates(app, passengers):
+    with app.app_context():
+        return sorted(db.session.execute(
+            select(Vehicle.license_plate_number)
+            .where(Vehicle.seats >= passengers, Vehicle.available_at(datetime.now(tz=EET)))
+        ).scalars())
+
+
+def test_index_matches_database_after_random_writes(app, client, add_vehicle):
+    rng = random.Random(11)
+    plates = []
+    for number in range(20):
+        plates.append(add_vehicle(f'IDX-{number}', rng.randint(1, 9), rng.choice(('hybrid', 'gasoline')))
+                      ['license_plate_number'])
+    listed_plates(client, 1)  # load the index before the writes start
+
+    for step in range(150):
+        action = rng.choice(('add', 'update', 'delete', 'select', 'release', 'reserve'))
+        plate = rng.choice(plates) if plates else None
+        if action == 'add' or plate is None:
+            plates.append(add_vehicle(f'IDX-NEW-{step}', rng.randint(1, 9))['license_plate_number'])
+        elif action == 'update':
+            client.put('/all/fleet', json={'license_plate_number': plate, 'seats': rng.randint(1, 9),
+                                           'fuel_type': rng.choice(('hybrid', 'gasoline'))})
+        elif action == 'delete':
+            client.delete('/all/fleet', json={'license_plate_number': plate})
+            plates.remove(plate)
+        elif action == 'select':
+            client.put(f'/select/{plate}?distance={rng.randint(5, 100)}')
+        elif action == 'release':
+            client.patch(f'/select/{plate}')
+        else:
+            client.put(f'/reserve?passengers={rng.randint(1, 6)}&distance={rng.randint(5, 100)}')
+
+        passengers = rng.randint(1, 9)
+        assert listed_plates(client, passengers) == database_plates(app, passengers), (step, action)
+
+
+def test_refreshes_applied_out_of_commit_order_converge(app, client, add_vehicle, monkeypatch):
+    add_vehicle('RACE-1')
+    assert listed_plates(client, 1) == ['RACE-1']
+
+    # Hold back the index updates of three commits, then apply them newest first
+    pending = []
+    with monkeypatch.context() as patch:
+        patch.setattr(fleet_index, 'refresh', lambda *vehicle_ids: pending.append(vehicle_ids))
+        assert client.put('/select/RACE-1?distance=30').status_code == 200
+        assert client.patch('/select/RACE-1').status_code == 200
+        assert client.put('/select/RACE-1?distance=30').status_code == 200
+
+    with app.app_context():
+        for vehicle_ids in reversed(pending):
+            fleet_index.refresh(*vehicle_ids)
+    assert listed_plates(client, 1) == database_plates(app, 1) == []
+
+
+def test_lost_claims_leave_the_fleet_version_alone(app, client, add_vehicle):
+    add_vehicle('CLAIM-1')
+    assert client.put('/select/CLAIM-1?distance=10').status_code == 200
+    with app.app_context():
+        version = fleet_version()
+
+    for _ in range(5):
+        assert client.put('/select/CLAIM-1?distance=10').status_code == 400
+    with app.app_context():
+        assert fleet_version() == version
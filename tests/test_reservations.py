@@ -0,0 +1,52 @@
+import threading
+from collections import Counter
+
+from models import db, Vehicle
+
+
+def race(threads, request):
+    """
+    Run `request()` in `threads` threads released at the same moment.
+    Returns the responses.
+    """
+    barrier = threading.Barrier(threads)
+    responses = [None] * threads
+
+    def worker(slot):
+        barrier.wait()
+        responses[slot] = request()
+
+    pool = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return responses
+
+
+def test_one_plate_has_exactly_one_winner(app, add_vehicle):
+    add_vehicle('RACE-1')
+    responses = race(16, lambda: app.test_client().put('/select/RACE-1?distance=40'))
+
+    assert Counter(response.status_code for response in responses) == {200: 1, 400: 15}
+    with app.app_context():
+        assert db.session.execute(db.select(Vehicle.on_route)).scalar_one() is True
+
+
+def test_concurrent_reservations_never_double_book(app, add_vehicle):
+    for number in range(24):
+        add_vehicle(f'LOAD-{number}', seats=4 + number % 3)
+
+    def reserve_until_empty():
+        client, reserved = app.test_client(), []
+        while True:
+            response = client.put('/reserve?passengers=2&distance=25')
+            if response.status_code == 200:
+                reserved.append(response.get_json()['vehicle']['license_plate'])
+            elif response.status_code == 404:
+                return reserved
+            else:
+                assert response.status_code == 409  # every candidate was taken, try again
+
+    reserved = [plate for plates in race(8, reserve_until_empty) for plate in plates]
+    assert len(reserved) == len(set(reserved)) == 24
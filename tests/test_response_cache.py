@@ -0,0 +1,58 @@
+import pytest
+import cache
+from cache import combinations_cache
+
+RANKING = '/combinations?passengers=2&distance=30'
+
+
+def plates(response):
+    assert response.status_code == 200
+    return [row['license_plate'] for row in response.get_json()['possible_combinations']]
+
+
+def counters(client):
+    stats = client.get('/combinations/cache').get_json()
+    return stats['hits'], stats['misses']
+
+
+@pytest.mark.parametrize('write', [
+    lambda client: client.post('/all/fleet', json={
+        'fuel_type': 'hybrid', 'range': 500, 'distance': 0, 'seats': 5, 'license_plate_number': 'CACHE-2',
+        'car_brand': 'Opel', 'driver_name': 'Ana', 'on_route': False}),
+    lambda client: client.put('/select/CACHE-1?distance=20'),
+    lambda client: client.delete('/all/fleet', json={'license_plate_number': 'CACHE-1'}),
+], ids=['add', 'select', 'delete'])
+def test_writes_invalidate_cached_rankings(client, add_vehicle, monkeypatch, write):
+    monkeypatch.setattr(combinations_cache, 'ttl', 60)  # only the write may end the entry
+    add_vehicle('CACHE-1')
+    first = plates(client.get(RANKING))
+    assert plates(client.get(RANKING)) == first == ['CACHE-1']
+    assert counters(client) == (1, 1)
+
+    assert write(client).status_code in (200, 201)
+    after = plates(client.get(RANKING))
+    assert after != first
+    assert counters(client) == (1, 2)
+
+
+class UnavailableBackend:
+    evictions = expirations = None
+
+    def size(self):
+        return None
+
+    def __getattr__(self, name):
+        def fail(*args):
+            raise ConnectionError("cache is down")
+        return fail
+
+
+def test_unavailable_backend_costs_a_miss_not_the_request(client, add_vehicle, monkeypatch):
+    monkeypatch.setattr(cache, 'BACKEND_ERRORS', (ConnectionError,))
+    monkeypatch.setattr(combinations_cache, 'backend', UnavailableBackend())
+
+    add_vehicle('DOWN-1')  # bump_version() fails after the commit
+    assert plates(client.get(RANKING)) == ['DOWN-1']
+    assert plates(client.get(RANKING)) == ['DOWN-1']
+    stats = client.get('/combinations/cache').get_json()
+    assert (stats['hits'], stats['misses'], stats['fleet_version']) == (0, 2, None)